@@ -0,0 +1,324 @@
+"""
+Benchmarks generation phases (get_models, render, format, write) of every combustion
+chamber over synthetic schemas, and compares them to a stored JSON baseline.
+
+    python -m benchmarks.generation --sizes 10 --sizes 100 --save
+    python -m benchmarks.generation --sizes 10 --sizes 100 --compare
+    python -m benchmarks.generation --sizes 1000 --engine jinja --engine native
+"""
+
+import contextlib
+import itertools
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import date, datetime
+from datetime import time as time_of_day
+from datetime import timedelta
+from decimal import Decimal
+from ipaddress import IPv4Address, IPv4Network, IPv6Address, IPv6Network
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple, Type
+from uuid import UUID
+
+import click
+from pydantic import create_model
+
+from reactant import DjangoORM, Field, PeeweeORM, SQLAlchemyORM, __version__
+from reactant.main import Reactant
+from reactant.products import (
+    Product,
+    format_code,
+    format_products,
+    write_products,
+)
+from reactant.reaction import ENGINES
+
+BASELINE = Path(__file__).parent / "baselines" / "generation.json"
+DEFAULT_SIZES = (10, 100, 1000, 10000)
+PHASES = ("get_models", "render", "format", "write")
+
+# Absolute differences below these never count as regressions, to ignore timer noise.
+MIN_SECONDS = 0.005
+MIN_BYTES = 64 * 1024
+
+SUPPORTED_TYPES: Dict[str, List[type]] = {
+    "django": [
+        str,
+        int,
+        float,
+        bool,
+        datetime,
+        date,
+        timedelta,
+        time_of_day,
+        bytes,
+        Decimal,
+        IPv4Address,
+        IPv4Network,
+        IPv6Address,
+        IPv6Network,
+        Path,
+        UUID,
+    ],
+    "peewee": [
+        str,
+        int,
+        float,
+        bool,
+        datetime,
+        date,
+        time_of_day,
+        bytes,
+        Decimal,
+        IPv4Address,
+        IPv4Network,
+        Path,
+        UUID,
+    ],
+    "sqla": [
+        str,
+        int,
+        float,
+        bool,
+        datetime,
+        date,
+        timedelta,
+        time_of_day,
+        bytes,
+        Decimal,
+        IPv4Address,
+        IPv4Network,
+        IPv6Address,
+        IPv6Network,
+        Path,
+        UUID,
+    ],
+}
+
+BASES: Dict[str, Type[Reactant]] = {
+    "django": DjangoORM,
+    "peewee": PeeweeORM,
+    "sqla": SQLAlchemyORM,
+}
+
+
+def make_reactants(target: str, models: int, fields: int) -> List[Type[Reactant]]:
+    """
+    Builds `models` reactants of `fields` plain fields each, cycling through every type
+    supported by the target. Each reactant but the first also relates to the previous
+    one: a foreign key for every target, plus a many-to-many and a one-to-one for Django.
+    """
+    types = SUPPORTED_TYPES[target]
+    reactants = []
+    for index in range(models):
+        definitions: Dict[str, Any] = {}
+        for position in range(fields):
+            field_type = types[(index + position) % len(types)]
+            name = f"field_{position}"
+            if position % 3 == 0:
+                definitions[name] = (Optional[field_type], None)
+            elif field_type is str:
+                definitions[name] = (str, Field(max_length=32, title=name))
+            else:
+                definitions[name] = (field_type, Field(help_text=f"{name} help"))
+
+        if index:
+            previous = f"BenchModel{index - 1}"
+            definitions["parent"] = (str, Field(foreign_key=previous))
+            if target == "django":
+                definitions["peers"] = (str, Field(many_key=previous))
+                definitions["twin"] = (str, Field(one_key=previous))
+
+        reactants.append(
+            create_model(f"BenchModel{index}", __base__=BASES[target], **definitions)
+        )
+    return reactants
+
+
+def make_chamber(target: str, reactants: List[Type[Reactant]]) -> Any:
+    if target == "django":
+        from reactant.renderer.django import DjangoCombustionChamber
+
+        return DjangoCombustionChamber(reactants)
+    if target == "peewee":
+        from reactant.renderer.peewee import PeeweeCombustionChamber
+
+        return PeeweeCombustionChamber(reactants)
+
+    from reactant.renderer.sqla import SQLAlchemyCombustionChamber
+
+    return SQLAlchemyCombustionChamber(reactants)
+
+
+def measure(phase: Callable[[], Any]) -> Tuple[Any, Dict[str, float]]:
+    """Runs a phase once, recording its wall time and its tracemalloc peak."""
+    tracemalloc.start()
+    start = time.perf_counter()
+    try:
+        result = phase()
+        seconds = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return result, {"seconds": seconds, "peak_bytes": peak}
+
+
+def run_case(
+    target: str, models: int, fields: int, engine: str = "jinja"
+) -> Dict[str, Dict[str, float]]:
+    reactants = make_reactants(target, models, fields)
+    chamber = make_chamber(target, reactants)
+    results = {}
+
+    built, results["get_models"] = measure(chamber.get_models)
+    # render_manager introspects through get_models, which is measured on its own.
+    chamber.get_models = lambda: built
+
+    def render() -> List[Product]:
+        return [
+            product._replace(chunks=list(product.chunks))
+            for product in chamber.render_manager(engine=engine)
+        ]
+
+    products, results["render"] = measure(render)
+    formatted, results["format"] = measure(lambda: format_products(products, workers=1))
+
+    with tempfile.TemporaryDirectory() as directory:
+        written = [
+            product._replace(directory=os.path.join(directory, target))
+            for product in products
+        ]
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            _, results["write"] = measure(
+                lambda: write_products(written, [[code] for code in formatted])
+            )
+
+    return results
+
+
+def compare(
+    baseline: Dict[str, Any], current: Dict[str, Any], threshold: float
+) -> List[str]:
+    """Lists every phase that got slower or hungrier than the baseline allows."""
+    regressions = []
+    minimums = {"seconds": MIN_SECONDS, "peak_bytes": MIN_BYTES}
+    for case, phases in current["results"].items():
+        if case not in baseline["results"]:
+            continue
+        for phase, metrics in phases.items():
+            for metric, value in metrics.items():
+                before = baseline["results"][case][phase][metric]
+                too_high = value > before * (1 + threshold)
+                if too_high and value - before > minimums[metric]:
+                    regressions.append(
+                        f"{case} {phase} {metric}: {before:.4g} -> {value:.4g}"
+                    )
+    return regressions
+
+
+def missing_cases(baseline: Dict[str, Any], current: Dict[str, Any]) -> List[str]:
+    """Cases of the current run that the baseline has no results for."""
+    return [case for case in current["results"] if case not in baseline["results"]]
+
+
+@click.command()
+@click.option(
+    "--sizes",
+    "-s",
+    multiple=True,
+    type=int,
+    default=DEFAULT_SIZES,
+    show_default=True,
+    help="Numbers of models to generate. Repeat for several sizes.",
+)
+@click.option("--fields", "-f", default=10, show_default=True, help="Fields per model.")
+@click.option(
+    "--target",
+    "-t",
+    "targets",
+    multiple=True,
+    type=click.Choice(list(BASES)),
+    default=list(BASES),
+    help="Chambers to benchmark. Repeat for several targets. Defaults to all.",
+)
+@click.option(
+    "--baseline",
+    type=click.Path(dir_okay=False, path_type=Path),
+    default=BASELINE,
+    show_default=True,
+)
+@click.option(
+    "--engine",
+    "-e",
+    "engines",
+    multiple=True,
+    type=click.Choice(list(ENGINES)),
+    default=["jinja"],
+    show_default=True,
+    help="Engines that produce the model files. Repeat to compare them.",
+)
+@click.option("--save", is_flag=True, help="Store the results as the new baseline.")
+@click.option(
+    "--compare", "compare_baseline", is_flag=True, help="Fail on regressions."
+)
+@click.option(
+    "--threshold",
+    default=0.2,
+    show_default=True,
+    help="Allowed relative increase over the baseline.",
+)
+def main(sizes, fields, targets, engines, baseline, save, compare_baseline, threshold):
+    current: Dict[str, Any] = {
+        "meta": {
+            "reactant": __version__,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "fields": fields,
+        },
+        "results": {},
+    }
+    # Importing black would otherwise be measured as part of the first format phase.
+    format_code("")
+
+    for target, size, engine in itertools.product(targets, sizes, engines):
+        # Cases of the default engine keep the names of older baselines.
+        case = f"{target}/{size}" if engine == "jinja" else f"{target}/{size}/{engine}"
+        current["results"][case] = results = run_case(target, size, fields, engine)
+        summary = ", ".join(
+            f"{phase} {results[phase]['seconds']:.3f}s "
+            f"{results[phase]['peak_bytes'] / 2**20:.1f}MiB"
+            for phase in PHASES
+        )
+        click.echo(f"{case}: {summary}")
+
+    if save:
+        baseline.parent.mkdir(parents=True, exist_ok=True)
+        baseline.write_text(json.dumps(current, indent=2, sort_keys=True))
+        click.secho(f"Baseline saved to {baseline}.", fg="green")
+
+    if compare_baseline:
+        stored = json.loads(baseline.read_text())
+        missing = missing_cases(stored, current)
+        if len(missing) == len(current["results"]):
+            click.secho("No case of this run is in the baseline.", fg="red")
+            sys.exit(1)
+        for case in missing:
+            click.secho(
+                f"{case} is not in the baseline, so it is not compared.", fg="yellow"
+            )
+        regressions = compare(stored, current, threshold)
+        if regressions:
+            click.secho("Regressions over the baseline:", fg="red")
+            for regression in regressions:
+                click.echo(f"  {regression}")
+            sys.exit(1)
+        click.secho("No regressions over the baseline.", fg="green")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+"""
+Benchmarks the list serialization of the generated Django endpoints: rows built as
+model instances, serialized by their ModelSerializer and rendered by DRF's
+JSONRenderer ("model"), against rows read with values() and rendered by
+FastJSONRenderer ("values").
+
+    python -m benchmarks.serialization --rows 10000
+"""
+
+import importlib
+import json
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from types import ModuleType
+from typing import Callable, Dict
+
+import click
+
+from reactant import DjangoORM, Field
+from reactant.reaction import SERIALIZATIONS, generate
+
+APP = "serialization_benchmark"
+
+
+class Pad(DjangoORM):
+    site: str = Field(max_length=32)
+
+
+class Launch(DjangoORM):
+    name: str = Field(max_length=32)
+    payload: int
+    cost: float
+    launched: datetime
+    crewed: bool
+    pad: str = Field(foreign_key="Pad")
+
+
+def serializer(mode: str, app: ModuleType, name: str) -> Callable[..., bytes]:
+    """Serializes and renders the rows of a queryset like the list endpoints do."""
+    from rest_framework.renderers import JSONRenderer
+
+    if mode == "model":
+        model_serializer = getattr(app.serializers, f"{name}Serializer")
+        renderer = JSONRenderer()
+        return lambda queryset: renderer.render(
+            model_serializer(queryset, many=True).data
+        )
+
+    values_serializer = getattr(app.serializers, f"{name}ValuesSerializer")
+    fast_renderer = app.renderers.FastJSONRenderer()
+    return lambda queryset: fast_renderer.render(
+        values_serializer(values_serializer.values(queryset)).data
+    )
+
+
+def measure(app: ModuleType, name: str, queryset, repeat: int = 3) -> Dict[str, float]:
+    """Best wall time of serializing every row of `queryset` under each mode."""
+    seconds = {}
+    for mode in SERIALIZATIONS:
+        serialize = serializer(mode, app, name)
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            serialize(queryset.all())
+            timings.append(time.perf_counter() - start)
+        seconds[mode] = min(timings)
+    return seconds
+
+
+def setup_app(directory: Path) -> ModuleType:
+    """Generates the reactants in values mode as an app, then sets Django up with it."""
+    import django
+    from django.conf import settings
+    from django.db import connection
+
+    cwd = os.getcwd()
+    os.chdir(directory)
+    try:
+        generate(
+            reactants=[Pad, Launch],
+            class_based=False,
+            function_based=False,
+            viewset_based=False,
+            serialization="values",
+            cache=False,
+            workers=1,
+        )
+    finally:
+        os.chdir(cwd)
+    products = directory / "reactant_products/django"
+    (products / "__init__.py").touch()
+    products.rename(directory / APP)
+    sys.path.insert(0, str(directory))
+
+    settings.configure(
+        INSTALLED_APPS=["rest_framework", APP],
+        DATABASES={
+            "default": {"ENGINE": "django.db.backends.sqlite3", "NAME": ":memory:"}
+        },
+        USE_TZ=True,
+    )
+    django.setup()
+    for module in ("models", "serializers", "renderers"):
+        importlib.import_module(f"{APP}.{module}")
+    app = importlib.import_module(APP)
+    with connection.schema_editor() as editor:
+        editor.create_model(app.models.Pad)
+        editor.create_model(app.models.Launch)
+    return app
+
+
+def fill(app: ModuleType, rows: int) -> None:
+    pads = app.models.Pad.objects.bulk_create(
+        app.models.Pad(site=f"LC-{number}") for number in range(10)
+    )
+    start = datetime(2021, 1, 1, tzinfo=timezone.utc)
+    app.models.Launch.objects.bulk_create(
+        (
+            app.models.Launch(
+                name=f"Launch {number}",
+                payload=number,
+                cost=number / 4,
+                launched=start + timedelta(hours=number),
+                crewed=number % 2 == 0,
+                pad=pads[number % len(pads)],
+            )
+            for number in range(rows)
+        ),
+        batch_size=1000,
+    )
+
+
+@click.command()
+@click.option(
+    "--rows", "-r", type=click.IntRange(min=1), default=10000, show_default=True
+)
+@click.option(
+    "--repeat",
+    type=click.IntRange(min=1),
+    default=3,
+    show_default=True,
+    help="Runs per mode, of which the fastest is reported.",
+)
+def main(rows, repeat):
+    with tempfile.TemporaryDirectory() as directory:
+        app = setup_app(Path(directory))
+        fill(app, rows)
+        queryset = app.models.Launch.objects.all()
+        model, values = (
+            json.loads(serializer(mode, app, "Launch")(queryset.all()))
+            for mode in SERIALIZATIONS
+        )
+        if values != model:
+            click.secho("The modes serialize the rows differently.", fg="red")
+            sys.exit(1)
+        seconds = measure(app, "Launch", queryset, repeat)
+
+    for mode, elapsed in seconds.items():
+        click.echo(f"{mode}: {elapsed:.3f}s, {rows / elapsed:,.0f} rows/s")
+    click.echo(f"values is {seconds['model'] / seconds['values']:.1f}x faster.")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,4 +2,13 @@ __version__ = "0.6.0"
 
 from pydantic import Field
 
-from reactant.main import DjangoORM, PeeweeORM, SQLAlchemyORM, generate
+from reactant.main import DjangoORM, Index, PeeweeORM, Reactant, SQLAlchemyORM
+
+
+def __getattr__(name):
+    # generate() brings in click and the rendering stack, so it is imported on first use.
+    if name == "generate":
+        from reactant.reaction import generate
+
+        return generate
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,105 @@
+import io
+import multiprocessing
+import os
+import sys
+import traceback
+from contextlib import redirect_stderr, redirect_stdout
+from multiprocessing.connection import Connection
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+
+from reactant import profiling
+from reactant.products import Product, deliver_products, product_files
+
+
+class TargetResult(NamedTuple):
+    """What a target's worker process reports back once its products are written."""
+
+    target: str
+    output: str
+    files: List[str]
+    error: Optional[str]
+    profile: Optional[Dict[str, Any]]
+
+
+class CapturedOutput(io.StringIO):
+    """Keeps colors when the output is replayed to a terminal."""
+
+    def __init__(self, isatty: bool) -> None:
+        super().__init__()
+        self._isatty = isatty
+
+    def isatty(self) -> bool:
+        return self._isatty
+
+
+def can_fork() -> bool:
+    # Jobs close over the reactants, which are not always importable by a new process.
+    return "fork" in multiprocessing.get_all_start_methods()
+
+
+def _run_target(
+    target: str,
+    job: Callable[[], List[Product]],
+    workers: int,
+    stream: bool,
+    cache: bool,
+    isatty: bool,
+    connection: Connection,
+) -> None:
+    output = CapturedOutput(isatty)
+    files: List[str] = []
+    error = None
+    with redirect_stdout(output), redirect_stderr(output):
+        try:
+            products = job()
+            deliver_products(products, workers, stream, cache)
+            files = product_files(products).get(target, [])
+        except BaseException:
+            error = traceback.format_exc()
+
+    profiler = profiling.active()
+    profile = None if profiler is None else profiler.targets.get(target)
+    connection.send(TargetResult(target, output.getvalue(), files, error, profile))
+    connection.close()
+
+
+def run_targets(
+    jobs: Dict[str, Callable[[], List[Product]]],
+    workers: Optional[int] = None,
+    stream: bool = False,
+    cache: bool = True,
+) -> List[TargetResult]:
+    """
+    Renders, formats, and writes the products of every target in its own process.
+    The formatting workers are shared out between targets. A failing target does not
+    stop the others; its error is reported in its result.
+    """
+    context = multiprocessing.get_context("fork")
+    if workers is None:
+        workers = os.cpu_count() or 1
+    target_workers = max(1, workers // len(jobs))
+    isatty = sys.stdout.isatty()
+
+    running = []
+    for target, job in jobs.items():
+        receiver, sender = context.Pipe(duplex=False)
+        process = context.Process(
+            target=_run_target,
+            args=(target, job, target_workers, stream, cache, isatty, sender),
+        )
+        process.start()
+        sender.close()
+        running.append((target, process, receiver))
+
+    results = []
+    for target, process, receiver in running:
+        try:
+            result = receiver.recv()
+        except EOFError:
+            result = None
+        process.join()
+        if result is None:
+            error = f"The {target} worker exited with code {process.exitcode}.\n"
+            result = TargetResult(target, "", [], error, None)
+        results.append(result)
+    return results
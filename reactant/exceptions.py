@@ -1,3 +1,6 @@
+from typing import Any, List
+
+
 class ReactionException(Exception):
     pass
 
@@ -6,3 +9,52 @@ class RenderFailed(ReactionException):
     def __init__(self, file_kind: str) -> None:
         message = f"Rendering {file_kind} failed."
         super().__init__(message)
+
+
+class UnsupportedFieldType(ReactionException):
+    def __init__(self, field_name: str, field_type: Any) -> None:
+        message = f"No ORM field type is registered for {field_name}: {field_type}."
+        super().__init__(message)
+
+
+class GenerationFailed(ReactionException):
+    def __init__(self, targets: List[str]) -> None:
+        message = f"Generating {', '.join(targets)} products failed."
+        super().__init__(message)
+
+
+class StaleProducts(ReactionException):
+    def __init__(self, targets: List[str]) -> None:
+        self.targets = targets
+        message = f"Reactant products of {', '.join(targets)} are stale."
+        super().__init__(message)
+
+
+class InvalidShard(ReactionException):
+    def __init__(self, reactant_name: str, shard: Any) -> None:
+        message = f"{reactant_name} has an invalid shard: {shard!r}."
+        super().__init__(message)
+
+
+class InvalidIndex(ReactionException):
+    def __init__(self, reactant_name: str, index: Any, reason: str) -> None:
+        message = f"{reactant_name} has an invalid index {index!r}: {reason}."
+        super().__init__(message)
+
+
+class InvalidRelationship(ReactionException):
+    def __init__(self, reactant_name: str, field_name: str, reason: str) -> None:
+        message = f"{reactant_name}.{field_name} has an invalid relationship: {reason}."
+        super().__init__(message)
+
+
+class InvalidPagination(ReactionException):
+    def __init__(self, reactant_name: str, option: str, value: Any) -> None:
+        message = f"{reactant_name} has an invalid {option}: {value!r}."
+        super().__init__(message)
+
+
+class InvalidBatchSize(ReactionException):
+    def __init__(self, reactant_name: str, batch_size: Any) -> None:
+        message = f"{reactant_name} has an invalid batch_size: {batch_size!r}."
+        super().__init__(message)
@@ -0,0 +1,199 @@
+import importlib
+import pkgutil
+import runpy
+import sys
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Type
+
+from click import secho
+
+from reactant.main import DjangoORM, PeeweeORM, Reactant, SQLAlchemyORM
+from reactant.reaction import deferred_generate
+
+BASE_REACTANTS = (Reactant, DjangoORM, PeeweeORM, SQLAlchemyORM)
+
+
+def reactants_in(namespace: Dict[str, Any]) -> Iterator[Type[Reactant]]:
+    for value in list(namespace.values()):
+        if (
+            isinstance(value, type)
+            and issubclass(value, Reactant)
+            and value not in BASE_REACTANTS
+        ):
+            yield value
+
+
+def defined_reactants() -> List[Type[Reactant]]:
+    """Reactants defined so far, like classify_reactants() finds them."""
+    return [
+        reactant
+        for base in (DjangoORM, PeeweeORM, SQLAlchemyORM)
+        for reactant in base.__subclasses__()
+    ]
+
+
+@contextmanager
+def tracking_reactants() -> Iterator[List[Type[Reactant]]]:
+    """Collects the reactants defined while loading, even those not kept in globals."""
+    before = set(defined_reactants())
+    created: List[Type[Reactant]] = []
+    try:
+        yield created
+    finally:
+        created.extend(r for r in defined_reactants() if r not in before)
+
+
+def is_package(path: Path) -> bool:
+    return path.is_dir() and (path / "__init__.py").is_file()
+
+
+def source_files(path: Path) -> List[Path]:
+    """Python files of a reactant file, package or directory."""
+    if path.is_dir():
+        return sorted(p.resolve() for p in path.rglob("*.py"))
+    return [path.resolve()]
+
+
+class ReactantLoader:
+    """
+    Loads reactant files and packages in the current process and collects their
+    reactants. Files are run as scripts, like `python generate.py` would, while the
+    modules of a package are imported. generate() calls made while loading are
+    deferred, and only their options are kept.
+    """
+
+    def __init__(self) -> None:
+        self.namespaces: Dict[Path, Dict[str, Any]] = {}
+        self.created: Dict[Path, List[Type[Reactant]]] = {}
+        self.options: Dict[Path, List[Dict[str, Any]]] = {}
+        # Module names of the files that belong to a package.
+        self.modules: Dict[Path, str] = {}
+        self.packages: Dict[Path, Path] = {}
+
+    def load(self, path: Path) -> None:
+        if is_package(path):
+            self.import_package(path)
+        elif path.is_dir():
+            for file in source_files(path):
+                self.run_script(file)
+        else:
+            self.run_script(path.resolve())
+
+    def run_script(self, file: Path) -> None:
+        directory = str(file.parent)
+        # Scripts import their neighbours, like when run by the interpreter.
+        sys.path.insert(0, directory)
+        try:
+            with deferred_generate() as calls, tracking_reactants() as created:
+                self.namespaces[file] = runpy.run_path(str(file), run_name="__main__")
+        finally:
+            sys.path.remove(directory)
+        self.options[file] = calls
+        self.created[file] = created
+
+    def import_package(self, directory: Path) -> None:
+        directory = directory.resolve()
+        parent = str(directory.parent)
+        if parent not in sys.path:
+            sys.path.insert(0, parent)
+        with deferred_generate() as calls, tracking_reactants() as created:
+            package = importlib.import_module(directory.name)
+            self.add_module(package, directory, calls)
+            walked = pkgutil.walk_packages(package.__path__, f"{package.__name__}.")
+            for info in walked:
+                module = importlib.import_module(info.name)
+                self.add_module(module, directory, calls)
+
+        files = {name: file for file, name in self.modules.items()}
+        for reactant in created:
+            file = files.get(reactant.__module__, directory / "__init__.py")
+            self.created.setdefault(file, []).append(reactant)
+
+    def add_module(self, module: Any, package: Path, calls: List[Dict]) -> None:
+        file = Path(module.__file__).resolve()
+        self.modules[file] = module.__name__
+        self.packages[file] = package
+        self.namespaces[file] = vars(module)
+        self.options[file] = calls
+
+    def module_name(self, file: Path, package: Path) -> str:
+        parts = list(file.relative_to(package.parent).with_suffix("").parts)
+        if parts[-1] == "__init__":
+            parts.pop()
+        return ".".join(parts)
+
+    def reload(self, files: Iterable[Path]) -> None:
+        """
+        Runs changed scripts again, and reloads changed modules along with the
+        modules that hold reactants of a reloaded module.
+        """
+        pending = list(files)
+        reloaded = set()
+        while pending:
+            file = pending.pop(0)
+            if file not in self.modules:
+                package = next(
+                    (p for p in set(self.packages.values()) if p in file.parents), None
+                )
+                if package is None:
+                    self.run_script(file)
+                    continue
+                name = self.module_name(file, package)
+                with deferred_generate() as calls, tracking_reactants() as created:
+                    self.add_module(importlib.import_module(name), package, calls)
+            else:
+                name = self.modules[file]
+                with deferred_generate() as calls, tracking_reactants() as created:
+                    module = importlib.reload(sys.modules[name])
+                self.namespaces[file] = vars(module)
+                self.options[file] = calls
+            self.created[file] = created
+            reloaded.add(name)
+
+            for other, other_name in self.modules.items():
+                if other_name in reloaded or other in pending:
+                    continue
+                if any(
+                    reactant.__module__ in reloaded
+                    for reactant in reactants_in(self.namespaces[other])
+                ):
+                    pending.append(other)
+
+    def forget(self, files: Iterable[Path]) -> None:
+        for file in files:
+            self.namespaces.pop(file, None)
+            self.created.pop(file, None)
+            self.options.pop(file, None)
+            name = self.modules.pop(file, None)
+            self.packages.pop(file, None)
+            if name is not None:
+                sys.modules.pop(name, None)
+
+    def reactants(self) -> List[Type[Reactant]]:
+        """
+        Reactants of every loaded file without duplicates: those defined while
+        loading in the order they were defined, then those imported from elsewhere.
+        """
+        collected: Dict[Type[Reactant], None] = {}
+        for created in self.created.values():
+            for reactant in created:
+                collected[reactant] = None
+        for namespace in self.namespaces.values():
+            for reactant in reactants_in(namespace):
+                collected[reactant] = None
+        return list(collected)
+
+    def generate_options(self) -> Dict[str, Any]:
+        """Options of the first generate() call, which must agree with the others."""
+        calls = [call for calls in self.options.values() for call in calls]
+        if not calls:
+            return {}
+        options = dict(calls[0])
+        if any(call != options for call in calls[1:]):
+            secho(
+                "generate() is called with different options. Using the first ones.",
+                fg="yellow",
+            )
+        options.pop("reactants", None)
+        return options
@@ -1,6 +1,5 @@
-from typing import Any, List, Tuple
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
 
-from click import secho
 from pydantic import BaseModel
 
 
@@ -9,6 +8,19 @@ class Reactant(BaseModel):
         super().__init__(**data)
 
 
+class Index(NamedTuple):
+    """
+    An index over fields of a reactant, declared in the `indexes` of its Config.
+    With `where` (field values to match), only the matching rows are indexed.
+    Its name defaults to one derived from the reactant and the fields.
+    """
+
+    fields: Sequence[str]
+    name: Optional[str] = None
+    unique: bool = False
+    where: Optional[Dict[str, Any]] = None
+
+
 class DjangoORM(Reactant):
     def __str__(self):
         return "django"
@@ -24,112 +36,34 @@ class SQLAlchemyORM(Reactant):
         return "sqlalchemy"
 
 
-def classify_reactants() -> Tuple[List[Any], ...]:
-    dj_classes = [cls for cls in DjangoORM.__subclasses__()]
-    alchemy_classes = [cls for cls in SQLAlchemyORM.__subclasses__()]
-    peewee_classes = [cls for cls in PeeweeORM.__subclasses__()]
-
-    return (dj_classes, alchemy_classes, peewee_classes)
-
-
-def generate_django(
-    dj_classes, base_directory, class_based, function_based, viewset_based
-) -> None:
-    try:
-        from reactant.renderer.django import DjangoCombustionChamber
-
-        # DjangoCombustionChamber class contains methods for generating the files.
-        secho(f"Found {len(dj_classes)} Django reactants.", fg="blue")
-        dj_rxn = DjangoCombustionChamber(dj_classes)
-        dj_rxn.render_manager(
-            class_based=class_based,
-            function_based=function_based,
-            viewset_based=viewset_based,
-        )
-    except ImportError:
-        secho(
-            "Failed to import django. Please install django to generate django files.",
-            fg="red",
-        )
-    except Exception:
-        secho("Sorry. Something went wrong rendering Django files.", fg="red")
-        raise
-    else:
-        secho(
-            f'Success! Please check "{base_directory}/django" directory.',
-            fg="cyan",
-        )
-
-
-def generate_peewee(peewee_classes, base_directory) -> None:
-    try:
-        from reactant.renderer.peewee import PeeweeCombustionChamber
-
-        # PeeweeCombustionChamber class contains methods for generating the files.
-        secho(f"Found {len(peewee_classes)} Peewee reactants.", fg="blue")
-        pw_rxn = PeeweeCombustionChamber(peewee_classes)
-        pw_rxn.render_manager()
-    except ImportError:
-        secho(
-            "Failed to import peewee. Please install peewee to generate peewee files.",
-            fg="red",
-        )
-    except Exception:
-        secho("Sorry. Something went wrong rendering Peewee files.", fg="red")
-        raise
-    else:
-        secho(
-            f'Success! Please check "{base_directory}/peewee" directory.',
-            fg="cyan",
-        )
-
-
-def generate_sqla(alchemy_classes, base_directory) -> None:
-    try:
-        from reactant.renderer.sqla import SQLAlchemyCombustionChamber
-
-        # SQLAlchemyCombustionChamber class contains methods for generating the files.
-        secho(f"Found {len(alchemy_classes)} SQLAlchemy reactants.", fg="blue")
-        pw_rxn = SQLAlchemyCombustionChamber(alchemy_classes)
-        pw_rxn.render_manager()
-    except ImportError:
-        secho(
-            "Failed to import sqlalchemy. Please install sqlalchemy to generate the files.",
-            fg="red",
-        )
-    except Exception:
-        secho("Sorry. Something went wrong rendering SQLAlchemy files.", fg="red")
-        raise
+def classify_reactants(
+    reactants: Optional[Sequence[Any]] = None,
+) -> Tuple[List[Any], ...]:
+    """
+    Sorts reactants by framework. Defaults to every subclass defined so far,
+    otherwise only the given reactants are sorted.
+    """
+    if reactants is None:
+        dj_classes = [cls for cls in DjangoORM.__subclasses__()]
+        alchemy_classes = [cls for cls in SQLAlchemyORM.__subclasses__()]
+        peewee_classes = [cls for cls in PeeweeORM.__subclasses__()]
     else:
-        secho(
-            f'Success! Please check "{base_directory}/sqla" directory.',
-            fg="cyan",
-        )
+        dj_classes = [cls for cls in reactants if issubclass(cls, DjangoORM)]
+        alchemy_classes = [cls for cls in reactants if issubclass(cls, SQLAlchemyORM)]
+        peewee_classes = [cls for cls in reactants if issubclass(cls, PeeweeORM)]
 
+    return (dj_classes, alchemy_classes, peewee_classes)
 
-def generate(
-    class_based: bool = True, function_based: bool = True, viewset_based: bool = True
-) -> None:
-    """
-    Deliver Reactant models to appropriate "generators".
-    """
 
-    dj_classes, alchemy_classes, peewee_classes = classify_reactants()
-    base_directory = "reactant_products"
+# Generators that moved to reactant.reaction, still importable from here.
+MOVED_TO_REACTION = ("generate", "generate_django", "generate_peewee", "generate_sqla")
 
-    if dj_classes:
-        generate_django(
-            dj_classes, base_directory, class_based, function_based, viewset_based
-        )
-    else:
-        secho("No Django reactants found.", fg="blue")
 
-    if peewee_classes:
-        generate_peewee(peewee_classes, base_directory)
-    else:
-        secho("No Peewee reactants found.", fg="blue")
+def __getattr__(name: str) -> Any:
+    # reactant.reaction brings in click and the rendering stack, so it is imported
+    # on first use, like generate() in reactant/__init__.py.
+    if name in MOVED_TO_REACTION:
+        from reactant import reaction
 
-    if alchemy_classes:
-        generate_sqla(alchemy_classes, base_directory)
-    else:
-        secho("No SQLAlchemy reactants found.", fg="blue")
+        return getattr(reaction, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
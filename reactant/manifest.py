@@ -0,0 +1,114 @@
+import hashlib
+import json
+import shutil
+from pathlib import Path
+from typing import Any, Dict, List, Sequence, Type
+
+from pydantic import BaseModel
+
+from reactant import __version__
+from reactant.orm.ir import CONFIG_OPTIONS
+
+MANIFEST_NAME = ".reactant-manifest.json"
+TEMPLATES_DIRECTORY = Path(__file__).parent / "templates"
+
+
+def describe_reactant(reactant: Type[BaseModel]) -> Dict[str, Any]:
+    """Collects everything about a reactant that can change the rendered files."""
+    fields = []
+    for name, value in reactant.__fields__.items():
+        fields.append(
+            {
+                "name": name,
+                "type": f"{value.type_.__module__}.{value.type_.__qualname__}",
+                "outer_type": repr(value.outer_type_),
+                "required": value.required,
+                "default": repr(value.field_info.default),
+                "max_length": value.field_info.max_length,
+                "title": value.field_info.title,
+                "extra": value.field_info.extra,
+            }
+        )
+    config = {
+        option: getattr(reactant.__config__, option, None) for option in CONFIG_OPTIONS
+    }
+    return {"name": reactant.__name__, "fields": fields, **config}
+
+
+def fingerprint_reactants(
+    target: str, reactants: Sequence[Type[BaseModel]], options: Dict[str, Any]
+) -> str:
+    """
+    Hashes the reactants of a target together with the render options,
+    the target's templates (and those shared by every target) and the reactant version.
+    """
+    hasher = hashlib.sha256()
+    hasher.update(__version__.encode())
+    hasher.update(json.dumps(options, sort_keys=True).encode())
+
+    templates = [
+        *TEMPLATES_DIRECTORY.glob(f"{target}_*"),
+        *TEMPLATES_DIRECTORY.glob("package_*"),
+    ]
+    for template in sorted(templates):
+        hasher.update(template.name.encode())
+        hasher.update(template.read_bytes())
+
+    for reactant in reactants:
+        description = json.dumps(
+            describe_reactant(reactant), sort_keys=True, default=repr
+        )
+        hasher.update(description.encode())
+
+    return hasher.hexdigest()
+
+
+class Manifest:
+    """
+    Keeps the fingerprint and the written files of every target in
+    reactant_products/.reactant-manifest.json.
+    """
+
+    def __init__(self, base_directory: str) -> None:
+        self.path = Path(base_directory) / MANIFEST_NAME
+        self.targets: Dict[str, Dict[str, Any]] = {}
+        if self.path.is_file():
+            try:
+                self.targets = json.loads(self.path.read_text())["targets"]
+            except (ValueError, KeyError):
+                self.targets = {}
+
+    def is_fresh(self, target: str, fingerprint: str) -> bool:
+        entry = self.targets.get(target)
+        if entry is None or entry["fingerprint"] != fingerprint:
+            return False
+        return all(Path(file).is_file() for file in entry["files"])
+
+    def update(self, target: str, fingerprint: str, files: List[str]) -> None:
+        self.targets[target] = {"fingerprint": fingerprint, "files": files}
+
+    def prune(self, target: str, files: List[str]) -> List[str]:
+        """
+        Deletes the files last written for a target that it no longer produces, e.g.
+        models.py once models are sharded into a package, and returns them.
+        """
+        entry = self.targets.get(target)
+        if entry is None:
+            return []
+        removed = [file for file in entry["files"] if file not in files]
+        for file in removed:
+            p = Path(file)
+            p.unlink(missing_ok=True)
+            # Leaves the directory of a former package if something else is in it.
+            if p.name == "__init__.py":
+                shutil.rmtree(p.parent / "__pycache__", ignore_errors=True)
+                try:
+                    p.parent.rmdir()
+                except OSError:
+                    pass
+        return removed
+
+    def save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        content = {"version": __version__, "targets": self.targets}
+        self.path.write_text(json.dumps(content, indent=2, sort_keys=True))
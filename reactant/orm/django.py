@@ -3,34 +3,33 @@ import uuid
 from datetime import date, datetime, time, timedelta
 from decimal import Decimal
 from pathlib import Path
-from typing import Any, Dict, List, NamedTuple, Sequence
-
-from django.db.models import (
-    BinaryField,
-    BooleanField,
-    CharField,
-    DateField,
-    DateTimeField,
-    DecimalField,
-    DurationField,
-    FloatField,
-    GenericIPAddressField,
-    IntegerField,
-    TimeField,
-    UUIDField,
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+from reactant.exceptions import UnsupportedFieldType
+from reactant.orm.ir import (
+    FieldIR,
+    IndexIR,
+    argument_positions,
+    describe_model,
+    select_options,
 )
-from pydantic.fields import ModelField, UndefinedType
+from reactant.orm.registry import TypeRegistry
 
 
 class DjangoModelField(NamedTuple):
     name: str
     type: str
-    extras: List[Dict[Any, Any]]
+    relation: Optional[str]
+    on_delete: Optional[str]
+    extras: Tuple[Tuple[str, Any], ...]
 
 
 class DjangoModel(NamedTuple):
     name: str
+    snake_name: str
+    plural_name: str
     fields: List[DjangoModelField]
+    indexes: Tuple[IndexIR, ...] = ()
 
 
 class DjangoCombustor:
@@ -85,110 +84,85 @@ class DjangoCombustor:
         "protocol",
         "unpack_ipv4",
     ]
+    valid_positions = argument_positions(valid_arguments)
+
+    # Field type and on_delete of each kind of relationship.
+    relation_fields: Dict[str, Tuple[str, Optional[str]]] = {
+        "foreign": ("ForeignKey", "models.CASCADE"),
+        "many": ("ManyToManyField", None),
+        "one": ("OneToOneField", "models.CASCADE"),
+    }
+
+    # SQLModel-inspired. Register more types with type_registry.register().
+    type_registry = TypeRegistry(
+        {
+            str: "CharField",
+            float: "FloatField",
+            bool: "BooleanField",
+            int: "IntegerField",
+            datetime: "DateTimeField",
+            date: "DateField",
+            timedelta: "DurationField",
+            time: "TimeField",
+            bytes: "BinaryField",
+            Decimal: "DecimalField",
+            ipaddress.IPv4Address: "GenericIPAddressField",
+            ipaddress.IPv4Network: "GenericIPAddressField",
+            ipaddress.IPv6Address: "GenericIPAddressField",
+            ipaddress.IPv6Network: "GenericIPAddressField",
+            Path: "CharField",
+            uuid.UUID: "UUIDField",
+        }
+    )
 
     @classmethod
-    def generate_django_orm_model(cls, reactant) -> DjangoModel:
-        table_name = reactant.__name__
-        columns = cls._get_columns(reactant)
-        model = DjangoModel(name=table_name, fields=columns)
-        return model
-
-    @classmethod
-    def _get_columns(cls, reactant) -> List[DjangoModelField]:
-        """Builds the list of fields for a model."""
-        column_list = []
-        for name, value in reactant.__fields__.items():
-            column_type = cls._map_type_to_orm_field(value)
-            column_type_final, extras_list = cls._filter_field_arguments(
-                column_type, value
-            )
-
-            column_info = DjangoModelField(
-                name=name, type=column_type_final.__name__, extras=extras_list
-            )
-            column_list.append(column_info)
-
-        return column_list
+    def generate_django_orm_model(cls, reactant, cache: bool = True) -> DjangoModel:
+        model = describe_model(reactant, cache)
+        return DjangoModel(
+            name=model.name,
+            snake_name=model.snake_name,
+            plural_name=model.plural_name,
+            fields=[cls._project_field(field) for field in model.fields],
+            indexes=model.indexes,
+        )
 
     @classmethod
-    def _map_type_to_orm_field(cls, field: ModelField) -> Any:
-        """SQLModel-inspired."""
-
-        if issubclass(field.type_, str):
-            return CharField
-        if issubclass(field.type_, float):
-            return FloatField
-        if issubclass(field.type_, bool):
-            return BooleanField
-        if issubclass(field.type_, int):
-            return IntegerField
-        if issubclass(field.type_, datetime):
-            return DateTimeField
-        if issubclass(field.type_, date):
-            return DateField
-        if issubclass(field.type_, timedelta):
-            return DurationField
-        if issubclass(field.type_, time):
-            return TimeField
-        if issubclass(field.type_, bytes):
-            return BinaryField
-        if issubclass(field.type_, Decimal):
-            return DecimalField
-        if issubclass(field.type_, ipaddress.IPv4Address):
-            return GenericIPAddressField
-        if issubclass(field.type_, ipaddress.IPv4Network):
-            return GenericIPAddressField
-        if issubclass(field.type_, ipaddress.IPv6Address):
-            return GenericIPAddressField
-        if issubclass(field.type_, ipaddress.IPv6Network):
-            return GenericIPAddressField
-        if issubclass(field.type_, Path):
-            return CharField
-        if issubclass(field.type_, uuid.UUID):
-            return UUIDField
+    def _map_type_to_orm_field(cls, field: FieldIR) -> str:
+        field_type = cls.type_registry.resolve(field.python_type)
+        if field_type is None:
+            raise UnsupportedFieldType(field.name, field.python_type)
+        return field_type
 
     @classmethod
-    def _filter_field_arguments(cls, column_type: Any, value: Any) -> Sequence[Any]:
+    def _project_field(cls, field: FieldIR) -> DjangoModelField:
         """
-        This will filter out options that are not valid for Django model fields,
-        and set defaults for required arguments that are not explicitly set in the reactant model.
+        Spells a field for Django: options that are not valid for Django model fields
+        are filtered out, and defaults are set for required arguments that are not
+        explicitly set in the reactant model.
         """
-
-        # actual filtering of the arguments
-        new_extra_options = {
-            k: value.field_info.extra[k]
-            for k in cls.valid_arguments
-            if k in value.field_info.extra
-        }
-
-        extras_list = []  # this holds the arguments for the given field
-
-        if not issubclass(type(value.field_info.default), UndefinedType):
-            extras_list.append({"default": value.field_info.default})
-        if new_extra_options:
-            for k, v in new_extra_options.items():
-                if k == "foreign_key":
-                    column_type.__name__ = "ForeignKey"
-                    extras_list.insert(
-                        0, {"relation": new_extra_options["foreign_key"]}
-                    )
-                    extras_list.insert(1, {"on_delete": "models.CASCADE"})
-                elif k == "many_key":
-                    column_type.__name__ = "ManyToManyField"
-                    extras_list.insert(0, {"relation": new_extra_options["many_key"]})
-                elif k == "one_key":
-                    column_type.__name__ = "OneToOneField"
-                    extras_list.insert(0, {"relation": new_extra_options["one_key"]})
-                    extras_list.insert(1, {"on_delete": "models.CASCADE"})
-                else:
-                    extras_list.append({f"{k}": v})
-        if value.required is False:
-            extras_list.append({"null": True})
-        if value.field_info.max_length:
-            extras_list.append({"max_length": value.field_info.max_length})
-        if value.field_info.title:
-            extras_list.append({"verbose_name": value.field_info.title})
-        if column_type.__name__ == "CharField" and value.field_info.max_length is None:
-            extras_list.append({"max_length": 64})
-
-        return (column_type, extras_list)
+        column_type = cls._map_type_to_orm_field(field)
+        relation = on_delete = None
+        if field.relation_kind is not None:
+            column_type, on_delete = cls.relation_fields[field.relation_kind]
+            relation = field.relation
+
+        extras = []
+        if field.has_default:
+            extras.append(("default", field.default))
+        extras.extend(select_options(field.options, cls.valid_positions))
+        if field.nullable:
+            extras.append(("null", True))
+        if field.max_length:
+            extras.append(("max_length", field.max_length))
+        if field.title:
+            extras.append(("verbose_name", field.title))
+        if column_type == "CharField" and field.max_length is None:
+            extras.append(("max_length", 64))
+
+        return DjangoModelField(
+            name=field.name,
+            type=column_type,
+            relation=relation,
+            on_delete=on_delete,
+            extras=tuple(extras),
+        )
@@ -0,0 +1,250 @@
+import hashlib
+import math
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple, Type
+from weakref import WeakKeyDictionary
+
+from pydantic import BaseModel
+from pydantic.fields import Undefined
+
+from reactant.exceptions import InvalidIndex
+from reactant.main import Index
+from reactant.utils import convert_to_snake
+
+# Field options that declare a relationship, and the kind of relationship they declare.
+RELATION_OPTIONS = {"foreign_key": "foreign", "many_key": "many", "one_key": "one"}
+
+# Attributes of a reactant's Config that reactant reads, see ModelIR.
+CONFIG_OPTIONS = ("shard", "page_size", "ordering", "indexes", "batch_size")
+
+# Longest index name, that of Django, the strictest of the ORMs.
+INDEX_NAME_LENGTH = 30
+
+Options = Tuple[Tuple[str, Any], ...]
+
+
+class FieldIR:
+    """
+    A reactant field, independent of any ORM. `options` holds the extra arguments
+    given to Field() in their given order, except the relationship, which is kept in
+    `relation_kind` ("foreign", "many" or "one") and `relation` (the related model).
+    `default` is pydantic's Undefined when the field has none.
+    """
+
+    __slots__ = (
+        "name",
+        "python_type",
+        "nullable",
+        "default",
+        "max_length",
+        "title",
+        "options",
+        "relation_kind",
+        "relation",
+        "relation_snake_name",
+    )
+
+    def __init__(
+        self,
+        name: str,
+        python_type: Any,
+        nullable: bool,
+        default: Any,
+        max_length: Optional[int],
+        title: Optional[str],
+        options: Options,
+        relation_kind: Optional[str],
+        relation: Optional[str],
+    ) -> None:
+        self.name = name
+        self.python_type = python_type
+        self.nullable = nullable
+        self.default = default
+        self.max_length = max_length
+        self.title = title
+        self.options = options
+        self.relation_kind = relation_kind
+        self.relation = relation
+        self.relation_snake_name = convert_to_snake(relation) if relation else None
+
+    @property
+    def has_default(self) -> bool:
+        return self.default is not Undefined
+
+
+class IndexIR(NamedTuple):
+    """An index of a reactant, named, with its `where` as (field, value) pairs."""
+
+    name: str
+    fields: Tuple[str, ...]
+    unique: bool
+    where: Options
+
+
+class ModelIR:
+    """
+    A reactant and its fields, with the names templates derive from it, and the
+    options its Config gives, if any: `shard` is the module of a sharded package
+    the reactant goes to, `page_size` and `ordering` set how its list endpoints
+    are paginated, `indexes` are those it declares (see describe_indexes), and
+    `batch_size` is the number of rows its bulk endpoints save per query.
+    """
+
+    __slots__ = (
+        "name",
+        "snake_name",
+        "plural_name",
+        "fields",
+        "shard",
+        "page_size",
+        "ordering",
+        "indexes",
+        "batch_size",
+    )
+
+    def __init__(
+        self,
+        name: str,
+        fields: Tuple[FieldIR, ...],
+        shard: Optional[str] = None,
+        page_size: Optional[int] = None,
+        ordering: Optional[str] = None,
+        indexes: Tuple[IndexIR, ...] = (),
+        batch_size: Optional[int] = None,
+    ) -> None:
+        self.name = name
+        self.snake_name = convert_to_snake(name)
+        self.plural_name = f"{self.snake_name}s"
+        self.fields = fields
+        self.shard = shard
+        self.page_size = page_size
+        self.ordering = ordering
+        self.indexes = indexes
+        self.batch_size = batch_size
+
+    @property
+    def declares_primary_key(self) -> bool:
+        """Whether a field is the primary key, instead of the "id" the ORMs add."""
+        return any(dict(field.options).get("primary_key") for field in self.fields)
+
+    def related(self, *kinds: str) -> List[str]:
+        """Names of the fields that relate to another model, by relationship kind."""
+        return [field.name for field in self.fields if field.relation_kind in kinds]
+
+
+def argument_positions(arguments: Sequence[str]) -> Dict[str, int]:
+    positions: Dict[str, int] = {}
+    for position, argument in enumerate(arguments):
+        positions.setdefault(argument, position)
+    return positions
+
+
+def select_options(
+    options: Options, positions: Dict[str, int]
+) -> List[Tuple[str, Any]]:
+    """Options that an ORM accepts, in the order of its argument positions."""
+    selected = [option for option in options if option[0] in positions]
+    selected.sort(key=lambda option: positions[option[0]])
+    return selected
+
+
+def index_name(snake_name: str, index: Index) -> str:
+    """A default name, e.g. "launch_site_idx", shortened with a hash if too long."""
+    name = "_".join([snake_name, *index.fields, "uniq" if index.unique else "idx"])
+    if len(name) > INDEX_NAME_LENGTH:
+        digest = hashlib.sha256(name.encode()).hexdigest()[:8]
+        name = f"{name[: INDEX_NAME_LENGTH - len(digest) - 1]}_{digest}"
+    return name
+
+
+def matchable(value: Any) -> bool:
+    """Whether every ORM can spell a match of a field to the value in a `where`."""
+    if isinstance(value, float):
+        return math.isfinite(value)
+    return value is None or isinstance(value, (bool, int, str))
+
+
+def describe_indexes(
+    reactant_name: str, fields: Sequence[FieldIR], indexes: Any
+) -> Tuple[IndexIR, ...]:
+    """
+    Checks the indexes of a reactant's Config against its fields, and names those
+    that are not named. Names must be unique and fit every ORM.
+    """
+    if indexes is None:
+        return ()
+    names = {field.name for field in fields}
+    snake_name = convert_to_snake(reactant_name)
+    described: Dict[str, IndexIR] = {}
+    for index in indexes:
+        if not isinstance(index, Index):
+            raise InvalidIndex(reactant_name, index, "declare it with reactant.Index")
+        if isinstance(index.fields, str) or not index.fields:
+            raise InvalidIndex(reactant_name, index, "give it a list of fields")
+        where = tuple((index.where or {}).items())
+        for field in [*index.fields, *(field for field, _ in where)]:
+            if field not in names:
+                raise InvalidIndex(reactant_name, index, f"no field is named {field}")
+        for _, value in where:
+            if not matchable(value):
+                raise InvalidIndex(reactant_name, index, f"cannot match {value!r}")
+        name = index.name or index_name(snake_name, index)
+        if (
+            not isinstance(name, str)
+            or not name.isidentifier()
+            or name.startswith("_")
+            or len(name) > INDEX_NAME_LENGTH
+        ):
+            raise InvalidIndex(reactant_name, index, "name it with 30 letters at most")
+        if name in described:
+            raise InvalidIndex(reactant_name, index, f"{name} is already taken")
+        described[name] = IndexIR(name, tuple(index.fields), bool(index.unique), where)
+    return tuple(described.values())
+
+
+_models: "WeakKeyDictionary[Type[BaseModel], ModelIR]" = WeakKeyDictionary()
+
+
+def describe_model(reactant: Type[BaseModel], cache: bool = True) -> ModelIR:
+    """
+    Introspects a reactant once. Every target projects the same ModelIR into its
+    own field spelling, so pydantic fields are walked only once per reactant.
+    Without `cache`, a reactant not described yet is introspected but not kept,
+    so streaming holds one model at a time.
+    """
+    try:
+        return _models[reactant]
+    except KeyError:
+        pass
+
+    fields = []
+    for name, value in reactant.__fields__.items():
+        info = value.field_info
+        options = []
+        relation_kind = relation = None
+        for key, option in info.extra.items():
+            if key in RELATION_OPTIONS:
+                relation_kind, relation = RELATION_OPTIONS[key], option
+            else:
+                options.append((key, option))
+        fields.append(
+            FieldIR(
+                name=name,
+                python_type=value.type_,
+                nullable=not value.required,
+                default=info.default,
+                max_length=info.max_length,
+                title=info.title,
+                options=tuple(options),
+                relation_kind=relation_kind,
+                relation=relation,
+            )
+        )
+
+    config: Dict[str, Any] = {
+        option: getattr(reactant.__config__, option, None) for option in CONFIG_OPTIONS
+    }
+    config["indexes"] = describe_indexes(reactant.__name__, fields, config["indexes"])
+    model = ModelIR(reactant.__name__, tuple(fields), **config)
+    if cache:
+        _models[reactant] = model
+    return model
@@ -0,0 +1,32 @@
+from typing import Any, Dict, Optional
+
+
+class TypeRegistry:
+    """
+    Maps Python types to the name of an ORM field type. A type resolves to the entry
+    of the first class in its MRO that is registered, and the result is memoized per type.
+    """
+
+    def __init__(self, mapping: Dict[type, str]) -> None:
+        self._mapping = dict(mapping)
+        self._resolved: Dict[Any, Optional[str]] = {}
+
+    def register(self, python_type: type, field_type: str) -> None:
+        """Adds or overrides the ORM field type used for python_type and its subclasses."""
+        self._mapping[python_type] = field_type
+        self._resolved.clear()
+
+    def resolve(self, python_type: Any) -> Optional[str]:
+        try:
+            return self._resolved[python_type]
+        except KeyError:
+            pass
+
+        field_type = None
+        for base in getattr(python_type, "__mro__", ()):
+            if base in self._mapping:
+                field_type = self._mapping[base]
+                break
+
+        self._resolved[python_type] = field_type
+        return field_type
@@ -3,35 +3,72 @@ import uuid
 from datetime import date, datetime, time, timedelta
 from decimal import Decimal
 from pathlib import Path
-from typing import Any, Dict, List, NamedTuple, Sequence
-
-from pydantic.fields import ModelField, UndefinedType
-from sqlalchemy import (
-    Boolean,
-    Date,
-    DateTime,
-    Enum,
-    Float,
-    ForeignKey,
-    Integer,
-    Interval,
-    LargeBinary,
-    Numeric,
-    String,
-    Time,
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from reactant.exceptions import InvalidRelationship, UnsupportedFieldType
+from reactant.orm.ir import (
+    FieldIR,
+    IndexIR,
+    ModelIR,
+    argument_positions,
+    describe_model,
+    select_options,
 )
-from sqlalchemy.dialects.postgresql import UUID
+from reactant.orm.registry import TypeRegistry
 
 
 class SQLAlchemyModelField(NamedTuple):
     name: str
     type: str
-    extras: List[Dict[Any, Any]]
+    length: Optional[int]
+    relation: Optional[str]
+    relation_snake_name: Optional[str]
+    extras: Tuple[Tuple[str, Any], ...]
+
+
+class SQLAlchemyRelationship(NamedTuple):
+    name: str
+    model: str
+    back_populates: Optional[str]
+    lazy: str
+    # Set on the many-to-one side of a foreign key to the model itself.
+    remote_side: Optional[str] = None
+    # Set when the model has several foreign keys to the same model.
+    foreign_keys: Optional[str] = None
 
 
 class SQLAlchemyModel(NamedTuple):
     name: str
+    snake_name: str
+    plural_name: str
     fields: List[SQLAlchemyModelField]
+    indexes: Tuple[IndexIR, ...] = ()
+    relationships: Tuple[SQLAlchemyRelationship, ...] = ()
+
+
+# Values of the `lazy` and `collection_lazy` options of a foreign key.
+LOADER_STRATEGIES = (
+    "select",
+    "selectin",
+    "joined",
+    "subquery",
+    "raise",
+    "raise_on_sql",
+    "noload",
+    "immediate",
+)
+
+
+def reference_name(field: FieldIR) -> str:
+    """The attribute of a foreign key's related object, its column being `<name>_id`."""
+    return field.name[: -len("_id")] if field.name.endswith("_id") else field.name
+
+
+def loader_strategy(model: ModelIR, field: FieldIR, option: str, default: str) -> str:
+    lazy = dict(field.options).get(option, default)
+    if lazy not in LOADER_STRATEGIES:
+        raise InvalidRelationship(model.name, field.name, f"{option}={lazy!r}")
+    return lazy
 
 
 class SQLAlchemyCombustor:
@@ -57,108 +94,190 @@ class SQLAlchemyCombustor:
         "comment",
         "foreign_key",
     ]
+    valid_positions = argument_positions(valid_arguments)
 
-    @classmethod
-    def generate_sqla_orm_models(cls, reactant) -> SQLAlchemyModel:
-        table_name = reactant.__name__
-        columns = cls._get_columns(reactant)
-        model = SQLAlchemyModel(name=table_name, fields=columns)
-        return model
+    # Register more types with type_registry.register().
+    type_registry = TypeRegistry(
+        {
+            str: "String",
+            float: "Float",
+            bool: "Boolean",
+            int: "Integer",
+            datetime: "DateTime",
+            date: "Date",
+            timedelta: "Interval",
+            time: "Time",
+            bytes: "LargeBinary",
+            Decimal: "Numeric",
+            ipaddress.IPv4Address: "String",
+            ipaddress.IPv4Network: "String",
+            ipaddress.IPv6Address: "String",
+            ipaddress.IPv6Network: "String",
+            Path: "String",
+            uuid.UUID: "UUID",
+        }
+    )
 
     @classmethod
-    def _get_columns(cls, reactant) -> List[SQLAlchemyModelField]:
-        """Builds the list of fields for a model."""
-        column_list = []
-        for name, value in reactant.__fields__.items():
-            column_type = cls._map_type_to_orm_field(value)
-            column_type_final, extras_list = cls._filter_field_arguments(
-                column_type, value
+    def generate_sqla_orm_models(
+        cls,
+        reactant,
+        relationships: Optional[Dict[str, List[SQLAlchemyRelationship]]] = None,
+        cache: bool = True,
+    ) -> SQLAlchemyModel:
+        """
+        Projects a reactant, with the relationships of describe_relationships(). They
+        default to those the reactant has on its own, i.e. without back_populates
+        unless it refers to itself.
+        """
+        model = describe_model(reactant, cache)
+        if relationships is None:
+            relationships = cls.describe_relationships([reactant], cache)
+        fields = [cls._project_field(field) for field in model.fields]
+        columns = {
+            field.name: column.name for field, column in zip(model.fields, fields)
+        }
+        indexes = [
+            index._replace(
+                fields=tuple(columns[field] for field in index.fields),
+                where=tuple((columns[field], value) for field, value in index.where),
             )
+            for index in model.indexes
+        ]
+        return SQLAlchemyModel(
+            name=model.name,
+            snake_name=model.snake_name,
+            plural_name=model.plural_name,
+            fields=fields,
+            indexes=tuple(indexes),
+            relationships=tuple(relationships[model.name]),
+        )
 
-            column_info = SQLAlchemyModelField(
-                name=name, type=column_type_final.__name__, extras=extras_list
-            )
-            column_list.append(column_info)
+    @classmethod
+    def describe_relationships(
+        cls, reactants: Sequence[Any], cache: bool = True
+    ) -> Dict[str, List[SQLAlchemyRelationship]]:
+        """
+        Relationships of every reactant, by name. A foreign key gives its reactant a
+        reference to the related object, loaded with its `lazy` option ("joined" by
+        default). When the related reactant is one of `reactants`, it gets the
+        collection of the referring objects back, loaded with the `collection_lazy`
+        option ("selectin" by default). A collection is named by the `related_name`
+        option, else after the referring reactant, e.g. "launchs", or "launchs_by_site"
+        when that name is taken.
+        """
+        models = [describe_model(reactant, cache) for reactant in reactants]
+        relationships: Dict[str, List[SQLAlchemyRelationship]] = {
+            model.name: [] for model in models
+        }
+        collections: Dict[str, List[SQLAlchemyRelationship]] = {
+            model.name: [] for model in models
+        }
+        foreign_keys = [
+            (model, field)
+            for model in models
+            for field in model.fields
+            if field.relation_kind == "foreign"
+        ]
+
+        # Attributes already taken in each reactant, and candidate collection names.
+        taken = {
+            model.name: {"id"}
+            | {field.name for field in model.fields}
+            | {reference_name(field) for field in model.fields}
+            for model in models
+        }
+        candidates: Dict[str, List[str]] = {model.name: [] for model in models}
+        for model, field in foreign_keys:
+            if field.relation in candidates:
+                candidates[field.relation].append(model.plural_name)
 
-        return column_list
+        pairs = [(model.name, field.relation) for model, field in foreign_keys]
+        for model, field in foreign_keys:
+            reference = reference_name(field)
+            parent = field.relation or ""
+            column = None
+            if pairs.count((model.name, parent)) > 1:
+                column = f"{model.name}.{reference}_id"
+            collection = None
+            if parent in collections:
+                collection = dict(field.options).get("related_name")
+                if collection is None:
+                    collection = model.plural_name
+                    if (
+                        candidates[parent].count(collection) > 1
+                        or collection in taken[parent]
+                    ):
+                        collection = f"{model.plural_name}_by_{reference}"
+                if collection in taken[parent]:
+                    raise InvalidRelationship(
+                        model.name, field.name, f"{parent}.{collection} is taken"
+                    )
+                taken[parent].add(collection)
+                collections[parent].append(
+                    SQLAlchemyRelationship(
+                        name=collection,
+                        model=model.name,
+                        back_populates=reference,
+                        foreign_keys=column,
+                        lazy=loader_strategy(
+                            model, field, "collection_lazy", "selectin"
+                        ),
+                    )
+                )
+            relationships[model.name].append(
+                SQLAlchemyRelationship(
+                    name=reference,
+                    model=parent,
+                    back_populates=collection,
+                    lazy=loader_strategy(model, field, "lazy", "joined"),
+                    remote_side=f"{parent}.id" if parent == model.name else None,
+                    foreign_keys=column,
+                )
+            )
+        # References come first, in the order of the fields, then collections.
+        for name, referrers in collections.items():
+            relationships[name].extend(referrers)
+        return relationships
 
     @classmethod
-    def _map_type_to_orm_field(cls, field: ModelField) -> Any:
-        if issubclass(field.type_, str):
-            return String
-        if issubclass(field.type_, float):
-            return Float
-        if issubclass(field.type_, bool):
-            return Boolean
-        if issubclass(field.type_, int):
-            return Integer
-        if issubclass(field.type_, datetime):
-            return DateTime
-        if issubclass(field.type_, date):
-            return Date
-        if issubclass(field.type_, timedelta):
-            return Interval
-        if issubclass(field.type_, time):
-            return Time
-        if issubclass(field.type_, Enum):
-            return Enum
-        if issubclass(field.type_, bytes):
-            return LargeBinary
-        if issubclass(field.type_, Decimal):
-            return Numeric
-        if issubclass(field.type_, ipaddress.IPv4Address):
-            return String
-        if issubclass(field.type_, ipaddress.IPv4Network):
-            return String
-        if issubclass(field.type_, ipaddress.IPv6Address):
-            return String
-        if issubclass(field.type_, ipaddress.IPv6Network):
-            return String
-        if issubclass(field.type_, Path):
-            return String
-        if issubclass(field.type_, uuid.UUID):
-            return UUID
+    def _map_type_to_orm_field(cls, field: FieldIR) -> str:
+        field_type = cls.type_registry.resolve(field.python_type)
+        if field_type is None:
+            raise UnsupportedFieldType(field.name, field.python_type)
+        return field_type
 
     @classmethod
-    def _filter_field_arguments(cls, column_type: Any, value: Any) -> Sequence[Any]:
+    def _project_field(cls, field: FieldIR) -> SQLAlchemyModelField:
         """
-        This will filter out arguments that are not valid for SQLAlchemy model fields,
-        and sets defaults for required argumenta that are not explicitly set in the reactant model.
+        Spells a field for SQLAlchemy: options that are not valid for SQLAlchemy columns
+        are filtered out, and defaults are set for required arguments that are not
+        explicitly set in the reactant model.
         """
+        column_type = cls._map_type_to_orm_field(field)
+        relation = relation_snake_name = None
+        if field.relation_kind == "foreign":
+            column_type = "ForeignKey"
+            relation = field.relation
+            relation_snake_name = field.relation_snake_name
 
-        # actual filtering of arguments
-        new_extra_options = {
-            k: value.field_info.extra[k]
-            for k in cls.valid_arguments
-            if k in value.field_info.extra
-        }
-
-        extras_list: List[Dict[str, Any]] = []
-
-        if not issubclass(type(value.field_info.default), UndefinedType):
-            extras_list.append({"default": value.field_info.default})
-        if value.required is False:
-            extras_list.append({"nullable": True})
-        if new_extra_options:
-            for k, v in new_extra_options.items():
-                if k == "foreign_key":
-                    column_type = ForeignKey
-                else:
-                    extras_list.append({f"{k}": v})
-
-        if column_type.__name__ == "ForeignKey":
-            extras_list.insert(
-                0,
-                {
-                    "column_type": {
-                        "relation": "ForeignKey",
-                        "value": v,
-                    }
-                },
-            )
-        elif column_type.__name__ == "String":
-            extras_list.insert(0, {"String": value.field_info.max_length})
-        else:
-            extras_list.insert(0, {"column_type": column_type.__name__})
+        extras = []
+        if field.has_default:
+            extras.append(("default", field.default))
+        if field.nullable:
+            extras.append(("nullable", True))
+        extras.extend(select_options(field.options, cls.valid_positions))
+        # Unlike the other ORMs, SQLAlchemy does not index foreign keys by itself.
+        set_options = dict(extras)
+        indexed = set_options.get("unique") or set_options.get("primary_key")
+        if relation and "index" not in set_options and not indexed:
+            extras.append(("index", True))
 
-        return (column_type, extras_list)
+        return SQLAlchemyModelField(
+            name=f"{reference_name(field)}_id" if relation else field.name,
+            type=column_type,
+            length=field.max_length,
+            relation=relation,
+            relation_snake_name=relation_snake_name,
+            extras=tuple(extras),
+        )
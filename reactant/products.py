@@ -0,0 +1,372 @@
+import filecmp
+import hashlib
+import os
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor
+from importlib import metadata
+from itertools import groupby
+from pathlib import Path
+from typing import (
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+from click import secho
+
+from reactant import profiling
+from reactant.exceptions import RenderFailed
+from reactant.utils import get_cache_directory
+
+
+class Product(NamedTuple):
+    """
+    A rendered file that is yet to be formatted and written by the shared stage.
+    Its code is a header chunk followed by one chunk per model, possibly produced lazily.
+    """
+
+    label: str
+    directory: str
+    item_name: str
+    chunks: Iterable[str]
+
+
+class FormattedCode(str):
+    """Code of a chunk that is already formatted, so it is written as is."""
+
+
+def format_code(code: str) -> str:
+    from black import FileMode, format_str
+
+    return format_str(code, mode=FileMode())
+
+
+def _format_timed(code: str) -> Tuple[str, float]:
+    """Formats code in a formatting worker, and measures it for profiling."""
+    start = time.perf_counter()
+    formatted = format_code(code)
+    return formatted, time.perf_counter() - start
+
+
+# Cached chunks unused for this many seconds are removed, checked at most once a day.
+MAX_CHUNK_AGE = 30 * 24 * 3600
+PRUNE_INTERVAL = 24 * 3600
+
+
+class ChunkCache:
+    """
+    On-disk cache of formatted chunks. A chunk is keyed by a hash of its source
+    and of the black version and mode used by format_code. Chunks that are not
+    used for MAX_CHUNK_AGE, like those of older models or black versions, are pruned.
+    """
+
+    def __init__(self, directory: Optional[Path]) -> None:
+        self.directory = directory
+        self.mode = f"black-{metadata.version('black')}-FileMode()"
+
+    @classmethod
+    def open(cls) -> "ChunkCache":
+        try:
+            return cls(get_cache_directory("chunks"))
+        except OSError:
+            return cls(None)
+
+    def key(self, chunk: str) -> str:
+        return hashlib.sha256(f"{self.mode}\0{chunk}".encode()).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        if self.directory is None:
+            return None
+        p = self.directory / key[:2] / key[2:]
+        try:
+            formatted = p.read_text(encoding="utf-8")
+            # Chunks in use stay recent, so that pruning keeps them.
+            os.utime(p)
+        except OSError:
+            return None
+        return formatted
+
+    def put(self, key: str, formatted: str) -> None:
+        if self.directory is None:
+            return
+        p = self.directory / key[:2] / key[2:]
+        staged_file = _staging_path(p)
+        try:
+            p.parent.mkdir(exist_ok=True)
+            staged_file.write_text(formatted, encoding="utf-8")
+            os.replace(staged_file, p)
+        except OSError:
+            staged_file.unlink(missing_ok=True)
+
+    def prune(self, max_age: float = MAX_CHUNK_AGE) -> None:
+        """Removes the chunks unused for `max_age` seconds, unless pruned in the last day."""
+        if self.directory is None:
+            return
+        marker = self.directory / ".pruned"
+        now = time.time()
+        try:
+            if now - marker.stat().st_mtime < PRUNE_INTERVAL:
+                return
+        except OSError:
+            pass
+        try:
+            marker.touch()
+        except OSError:
+            return
+        for p in self.directory.glob("*/*"):
+            try:
+                if now - p.stat().st_mtime > max_age:
+                    p.unlink()
+            except OSError:
+                continue
+
+
+def join_chunks(formatted_chunks: Iterable[str]) -> Iterator[str]:
+    """Chunks are top-level blocks, so they are separated by two blank lines."""
+    first = True
+    for formatted in formatted_chunks:
+        if not formatted:
+            continue
+        if not first:
+            yield "\n\n"
+        first = False
+        yield formatted
+
+
+def format_products(
+    products: Sequence[Product],
+    workers: Optional[int] = None,
+    cache: Optional[ChunkCache] = None,
+) -> List[str]:
+    """
+    Formats the chunks of every product with black, concurrently in a process pool,
+    and assembles each product's file. Chunks found in the cache, or already formatted
+    (FormattedCode), are not formatted again.
+    The formatted files are returned in the same order as the products.
+    """
+    if cache is None:
+        cache = ChunkCache(None)
+
+    chunk_keys: List[List[str]] = []
+    formatted: Dict[str, str] = {}
+    missing: Dict[str, str] = {}
+    # Product that first needed each missing chunk, to report its formatting time.
+    owners: Dict[str, Product] = {}
+    for product in products:
+        keys = []
+        for chunk in product.chunks:
+            key = cache.key(chunk)
+            keys.append(key)
+            if key in formatted or key in missing:
+                continue
+            if isinstance(chunk, FormattedCode):
+                formatted[key] = chunk
+                continue
+            cached = cache.get(key)
+            if cached is None:
+                missing[key] = chunk
+                owners[key] = product
+            else:
+                formatted[key] = cached
+        chunk_keys.append(keys)
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = min(workers, len(missing))
+
+    sources = list(missing.values())
+    if workers <= 1:
+        results = [_format_timed(code) for code in sources]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            chunksize = max(1, len(sources) // (workers * 4))
+            results = list(pool.map(_format_timed, sources, chunksize=chunksize))
+
+    profiler = profiling.active()
+    for key, (code, seconds) in zip(missing, results):
+        if profiler is not None:
+            owner = owners[key]
+            profiler.add(owner.directory, "format", seconds, owner.item_name)
+        formatted[key] = code
+        cache.put(key, code)
+
+    return ["".join(join_chunks(formatted[key] for key in keys)) for keys in chunk_keys]
+
+
+def _format_cached(chunk: str, cache: ChunkCache) -> str:
+    if isinstance(chunk, FormattedCode):
+        return chunk
+    key = cache.key(chunk)
+    formatted = cache.get(key)
+    if formatted is None:
+        formatted = format_code(chunk)
+        cache.put(key, formatted)
+    return formatted
+
+
+def format_chunks(
+    chunks: Iterable[str], cache: Optional[ChunkCache] = None
+) -> Iterator[str]:
+    """Formats the chunks of a product one at a time, for streaming."""
+    if cache is None:
+        cache = ChunkCache(None)
+    return join_chunks(_format_cached(chunk, cache) for chunk in chunks)
+
+
+def _staging_path(p: Path) -> Path:
+    return p.with_name(f".{p.name}.{os.getpid()}.reactant-tmp")
+
+
+def _write_contents(p: Path, contents: Iterable[str]) -> None:
+    # Files of a sharded package live in a subdirectory.
+    p.parent.mkdir(parents=True, exist_ok=True)
+    with open(p, "wb") as file:
+        for content in contents:
+            file.write(content.encode())
+
+
+def write_directory(
+    directory: str, items: Sequence[Tuple[Product, Iterable[str]]]
+) -> None:
+    """
+    Writes the formatted code of a directory's products. Nothing is put in place
+    before every file is staged: a new directory is staged as a whole and swapped in,
+    while in an existing one each changed file is staged then moved with os.replace.
+    Files whose content is already on disk are left untouched.
+    """
+    p = Path(directory)
+
+    if not p.is_dir():
+        p.parent.mkdir(parents=True, exist_ok=True)
+        staging = _staging_path(p)
+        shutil.rmtree(staging, ignore_errors=True)
+        try:
+            staging.mkdir()
+            for product, contents in items:
+                with profiling.phase(product.directory, "write", product.item_name):
+                    _write_contents(staging / f"{product.item_name}.py", contents)
+            os.replace(staging, p)
+        except BaseException:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+        for product, _ in items:
+            _written_secho(product)
+        return
+
+    staged: List[Tuple[Path, Path]] = []
+    try:
+        for product, contents in items:
+            destination = p / f"{product.item_name}.py"
+            staged_file = _staging_path(destination)
+            with profiling.phase(product.directory, "write", product.item_name):
+                _write_contents(staged_file, contents)
+                unchanged = destination.is_file() and filecmp.cmp(
+                    staged_file, destination, shallow=False
+                )
+            if unchanged:
+                staged_file.unlink()
+                continue
+            staged.append((staged_file, destination))
+    except BaseException:
+        for product, _ in items:
+            _staging_path(p / f"{product.item_name}.py").unlink(missing_ok=True)
+        raise
+
+    replaced = {destination for _, destination in staged}
+    for staged_file, destination in staged:
+        os.replace(staged_file, destination)
+    for product, _ in items:
+        if p / f"{product.item_name}.py" in replaced:
+            _written_secho(product)
+        else:
+            secho(f"{product.label} {product.item_name}.py unchanged.", fg="green")
+
+
+def write_products(
+    products: Sequence[Product], contents: Sequence[Iterable[str]]
+) -> None:
+    """Writes the formatted code of the products in order, one directory at a time."""
+    pairs = zip(products, contents)
+    for directory, items in groupby(pairs, key=lambda pair: pair[0].directory):
+        write_directory(directory, list(items))
+        secho(f'Success! Please check "{directory}" directory.', fg="cyan")
+
+
+def _written_secho(product: Product):
+    return secho(
+        f"{product.label} {product.item_name}.py finished rendering.", fg="green"
+    )
+
+
+def product_files(products: Iterable[Product]) -> Dict[str, List[str]]:
+    """Written files by target, e.g. "django" for "reactant_products/django"."""
+    files: Dict[str, List[str]] = {}
+    for product in products:
+        target = Path(product.directory).name
+        files.setdefault(target, []).append(
+            f"{product.directory}/{product.item_name}.py"
+        )
+    return files
+
+
+def reporting_render(product: Product) -> Iterator[str]:
+    """Chunks of a product that is rendered lazily, reporting render errors as such."""
+    try:
+        yield from product.chunks
+    except RenderFailed:
+        secho(f"Sorry. Something went wrong rendering {product.label} files.", fg="red")
+        raise
+
+
+def deliver_products(
+    products: Sequence[Product],
+    workers: Optional[int] = None,
+    stream: bool = False,
+    cache: bool = True,
+) -> None:
+    """
+    Formats all products in a single pass then writes them to their directories.
+    When streaming, each chunk is formatted and written as soon as it is rendered,
+    so only one model's code is held in memory at a time.
+    Formatted chunks are kept in reactant's cache unless `cache` is False.
+    When profiling, rendering, formatting, and writing are timed per file.
+    """
+    chunk_cache = ChunkCache.open() if cache else ChunkCache(None)
+    # Chambers render right away unless streaming, and time it themselves.
+    products = [
+        (
+            p
+            if isinstance(p.chunks, list)
+            else p._replace(
+                chunks=profiling.timed(
+                    p.directory, "render", p.item_name, reporting_render(p)
+                )
+            )
+        )
+        for p in products
+    ]
+
+    if stream:
+        contents = [
+            profiling.timed(
+                p.directory, "format", p.item_name, format_chunks(p.chunks, chunk_cache)
+            )
+            for p in products
+        ]
+        write_products(products, contents)
+        chunk_cache.prune()
+        return
+
+    try:
+        formatted = format_products(products, workers, chunk_cache)
+    except Exception:
+        secho("Sorry. Something went wrong formatting the rendered files.", fg="red")
+        raise
+    write_products(products, [[code] for code in formatted])
+    chunk_cache.prune()
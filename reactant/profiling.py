@@ -0,0 +1,131 @@
+import cProfile
+import json
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from reactant import __version__
+
+DEFAULT_REPORT = "reactant-profile.json"
+
+
+class Profiler:
+    """
+    Records how long each phase of generation takes, per target and per file.
+    Phases may nest (e.g. rendering pulls models that are introspected lazily),
+    so each phase is credited with its own time only, excluding nested phases.
+    """
+
+    def __init__(self) -> None:
+        self.started = time.perf_counter()
+        self.targets: Dict[str, Dict[str, Any]] = {}
+        self._nested: List[float] = []
+
+    def target(self, target: str) -> Dict[str, Any]:
+        # Also accepts a products directory, e.g. "reactant_products/django".
+        return self.targets.setdefault(
+            Path(target).name, {"models": 0, "fields": 0, "phases": {}, "files": {}}
+        )
+
+    def count(self, target: str, models: int, fields: int) -> None:
+        entry = self.target(target)
+        entry["models"] += models
+        entry["fields"] += fields
+
+    def add(
+        self, target: str, phase: str, seconds: float, item_name: Optional[str] = None
+    ) -> None:
+        entry = self.target(target)
+        if item_name is None:
+            timings = entry["phases"]
+        else:
+            timings = entry["files"].setdefault(f"{item_name}.py", {})
+        timings[phase] = timings.get(phase, 0.0) + seconds
+
+    @contextmanager
+    def phase(
+        self, target: str, phase: str, item_name: Optional[str] = None
+    ) -> Iterator[None]:
+        self._nested.append(0.0)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            nested = self._nested.pop()
+            if self._nested:
+                self._nested[-1] += elapsed
+            self.add(target, phase, elapsed - nested, item_name)
+
+    def report(self) -> Dict[str, Any]:
+        return {
+            "version": __version__,
+            "seconds": time.perf_counter() - self.started,
+            "targets": self.targets,
+        }
+
+
+_profiler: Optional[Profiler] = None
+
+
+def active() -> Optional[Profiler]:
+    return _profiler
+
+
+@contextmanager
+def phase(target: str, name: str, item_name: Optional[str] = None) -> Iterator[None]:
+    """Times a phase when profiling, does nothing otherwise."""
+    if _profiler is None:
+        yield
+        return
+    with _profiler.phase(target, name, item_name):
+        yield
+
+
+def timed(
+    target: str, name: str, item_name: str, iterable: Iterable[str]
+) -> Iterator[str]:
+    """Times the production of every item of a lazy iterable as a phase of a file."""
+    if _profiler is None:
+        return iter(iterable)
+    return _timed(_profiler, target, name, item_name, iter(iterable))
+
+
+def _timed(
+    profiler: Profiler,
+    target: str,
+    name: str,
+    item_name: str,
+    iterator: Iterator[str],
+) -> Iterator[str]:
+    while True:
+        with profiler.phase(target, name, item_name):
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+        yield item
+
+
+@contextmanager
+def profiling(report: str, cprofile: bool = False) -> Iterator[Profiler]:
+    """
+    Profiles generation, then writes a JSON report to `report`. With `cprofile`,
+    cProfile statistics are also dumped next to it, with a ".prof" suffix.
+    """
+    global _profiler
+    _profiler = Profiler()
+    profile = cProfile.Profile() if cprofile else None
+    if profile is not None:
+        profile.enable()
+    try:
+        yield _profiler
+    finally:
+        if profile is not None:
+            profile.disable()
+            profile.dump_stats(Path(report).with_suffix(".prof"))
+        report_path = Path(report)
+        report_path.parent.mkdir(parents=True, exist_ok=True)
+        report_path.write_text(json.dumps(_profiler.report(), indent=2, sort_keys=True))
+        _profiler = None
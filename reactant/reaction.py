@@ -0,0 +1,443 @@
+import os
+import sys
+from contextlib import contextmanager
+from functools import partial
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Type,
+    Union,
+)
+
+from click import secho
+
+from reactant import profiling
+from reactant.concurrency import can_fork, run_targets
+from reactant.exceptions import GenerationFailed, StaleProducts
+from reactant.main import Reactant, classify_reactants
+from reactant.manifest import Manifest, fingerprint_reactants
+from reactant.products import Product, deliver_products, product_files
+
+
+def generate_django(
+    dj_classes,
+    class_based,
+    function_based,
+    viewset_based,
+    stream=False,
+    engine="jinja",
+    shard_size=None,
+    pagination="cursor",
+    async_based=False,
+    serialization="model",
+) -> List[Product]:
+    try:
+        from reactant.renderer.django import DjangoCombustionChamber
+
+        # DjangoCombustionChamber class contains methods for generating the files.
+        secho(f"Found {len(dj_classes)} Django reactants.", fg="blue")
+        dj_rxn = DjangoCombustionChamber(dj_classes)
+        return dj_rxn.render_manager(
+            class_based=class_based,
+            function_based=function_based,
+            viewset_based=viewset_based,
+            stream=stream,
+            engine=engine,
+            shard_size=shard_size,
+            pagination=pagination,
+            async_based=async_based,
+            serialization=serialization,
+        )
+    except ImportError:
+        secho(
+            "Failed to import django. Please install django to generate django files.",
+            fg="red",
+        )
+    except Exception:
+        secho("Sorry. Something went wrong rendering Django files.", fg="red")
+        raise
+    return []
+
+
+def generate_peewee(
+    peewee_classes, stream=False, engine="jinja", shard_size=None
+) -> List[Product]:
+    try:
+        from reactant.renderer.peewee import PeeweeCombustionChamber
+
+        # PeeweeCombustionChamber class contains methods for generating the files.
+        secho(f"Found {len(peewee_classes)} Peewee reactants.", fg="blue")
+        pw_rxn = PeeweeCombustionChamber(peewee_classes)
+        return pw_rxn.render_manager(
+            stream=stream, engine=engine, shard_size=shard_size
+        )
+    except ImportError:
+        secho(
+            "Failed to import peewee. Please install peewee to generate peewee files.",
+            fg="red",
+        )
+    except Exception:
+        secho("Sorry. Something went wrong rendering Peewee files.", fg="red")
+        raise
+    return []
+
+
+def generate_sqla(
+    alchemy_classes, stream=False, engine="jinja", shard_size=None
+) -> List[Product]:
+    try:
+        from reactant.renderer.sqla import SQLAlchemyCombustionChamber
+
+        # SQLAlchemyCombustionChamber class contains methods for generating the files.
+        secho(f"Found {len(alchemy_classes)} SQLAlchemy reactants.", fg="blue")
+        pw_rxn = SQLAlchemyCombustionChamber(alchemy_classes)
+        return pw_rxn.render_manager(
+            stream=stream, engine=engine, shard_size=shard_size
+        )
+    except ImportError:
+        secho(
+            "Failed to import sqlalchemy. Please install sqlalchemy to generate the files.",
+            fg="red",
+        )
+    except Exception:
+        secho("Sorry. Something went wrong rendering SQLAlchemy files.", fg="red")
+        raise
+    return []
+
+
+# Ways of producing the model files, see generate().
+ENGINES = ("jinja", "native")
+
+# Ways of paginating the generated Django list endpoints, see generate().
+PAGINATIONS = ("cursor", "page_number")
+
+# Ways of serializing the rows of the generated Django list endpoints, see generate().
+SERIALIZATIONS = ("model", "values")
+
+
+def check_products(stale: List[str]) -> None:
+    """Reports stale targets and raises StaleProducts if there is any."""
+    if stale:
+        secho(f"Stale reactant products: {', '.join(stale)}.", fg="red")
+        raise StaleProducts(stale)
+    secho("Reactant products are up to date.", fg="green")
+
+
+# Options of the generate() calls recorded while generation is deferred.
+_deferred: Optional[List[Dict[str, Any]]] = None
+
+
+@contextmanager
+def deferred_generate() -> Iterator[List[Dict[str, Any]]]:
+    """
+    Records the options of generate() calls instead of generating, so that reactant
+    files loaded by the CLI are generated together in a single pass.
+    """
+    global _deferred
+    calls: List[Dict[str, Any]] = []
+    _deferred = calls
+    try:
+        yield calls
+    finally:
+        _deferred = None
+
+
+def generate(
+    class_based: bool = True,
+    function_based: bool = True,
+    viewset_based: bool = True,
+    workers: Optional[int] = None,
+    check: Optional[bool] = None,
+    force: bool = False,
+    stream: bool = False,
+    cache: bool = True,
+    profile: Union[bool, str, None] = None,
+    cprofile: Optional[bool] = None,
+    reactants: Optional[Sequence[Type[Reactant]]] = None,
+    concurrent: bool = False,
+    engine: str = "jinja",
+    shard_size: Optional[int] = None,
+    pagination: str = "cursor",
+    async_based: bool = False,
+    serialization: str = "model",
+) -> None:
+    """
+    Deliver Reactant models to appropriate "generators". Defaults to every reactant
+    defined so far, or only the given `reactants`.
+
+    The rendered files of every generator are formatted together in a pool of
+    `workers` processes (defaults to the number of CPUs) before being written.
+
+    Targets whose fingerprint matches the manifest in "reactant_products" are skipped
+    unless `force` is set. With `check` (defaults to the REACTANT_CHECK environment
+    variable), only fingerprints are compared and StaleProducts is raised if any
+    target is stale.
+
+    With `stream`, models are introspected, rendered, formatted, and written one at a
+    time, which bounds memory by the largest model instead of the whole schema.
+
+    Formatted chunks (the file header and each model's blocks) are cached on disk, so
+    only the chunks of changed models are formatted again. Pass `cache=False` to skip it.
+
+    With `profile` (a path, or True for "reactant-profile.json"; defaults to the
+    REACTANT_PROFILE environment variable), introspection, rendering, formatting, and
+    writing are timed per target and per file, and a JSON report is written. With
+    `cprofile` (defaults to the REACTANT_CPROFILE environment variable), cProfile
+    statistics are also dumped next to the report.
+
+    With `concurrent`, the stale targets (Django, Peewee, SQLAlchemy) are generated in
+    parallel processes that share the `workers`. A target that fails does not stop the
+    others, and GenerationFailed is raised once they are all done.
+
+    With the "native" `engine`, model files are emitted directly in black's layout
+    instead of rendering templates then formatting them with black. Both engines
+    write the same code; models the emitter is not certain about go through black.
+
+    With `shard_size`, the model files of every target are written as packages of
+    modules of at most `shard_size` models (e.g. "django/models/shard_1.py"), with an
+    __init__ that re-exports them. A reactant may pick its module with a `shard`
+    name in its Config. Shards are formatted independently, so they spread over the
+    formatting workers, and only the changed shards are formatted again.
+
+    Django list endpoints are paginated with a class per model (see pagination.py),
+    by cursor unless `pagination` is "page_number". A reactant's Config may set
+    the `page_size` and the `ordering` field of its pages (defaults to "pk").
+
+    With `async_based`, Django also gets async function-based views (views_async.py)
+    that query through the async ORM interface, and their urls (urls_async.py).
+
+    Django endpoints serialize rows with a ModelSerializer per model. With "values"
+    `serialization`, list endpoints read their rows as dicts with values() instead
+    of model instances, serialize them without per-row field machinery, and render
+    them with orjson when it is installed (see renderers.py). Writes still go
+    through the ModelSerializer.
+    """
+
+    if _deferred is not None:
+        _deferred.append(dict(locals()))
+        return
+
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown engine {engine!r}. Use one of {', '.join(ENGINES)}.")
+    if pagination not in PAGINATIONS:
+        raise ValueError(
+            f"Unknown pagination {pagination!r}. Use one of {', '.join(PAGINATIONS)}."
+        )
+    if serialization not in SERIALIZATIONS:
+        raise ValueError(
+            f"Unknown serialization {serialization!r}. "
+            f"Use one of {', '.join(SERIALIZATIONS)}."
+        )
+    if shard_size is not None and shard_size < 1:
+        raise ValueError("shard_size must be at least 1.")
+
+    if profile is None:
+        profile = os.environ.get("REACTANT_PROFILE") or None
+    if cprofile is None:
+        cprofile = os.environ.get("REACTANT_CPROFILE") == "1"
+    if profile is True or (cprofile and not profile):
+        profile = profiling.DEFAULT_REPORT
+
+    run = partial(
+        react,
+        class_based=class_based,
+        function_based=function_based,
+        viewset_based=viewset_based,
+        workers=workers,
+        check=check,
+        force=force,
+        stream=stream,
+        cache=cache,
+        reactants=reactants,
+        concurrent=concurrent,
+        engine=engine,
+        shard_size=shard_size,
+        pagination=pagination,
+        async_based=async_based,
+        serialization=serialization,
+    )
+    if not profile:
+        run()
+        return
+
+    with profiling.profiling(str(profile), cprofile):
+        run()
+    secho(f"Profile report written to {profile}.", fg="cyan")
+
+
+def count_reactants(target: str, reactants: List[Type[Reactant]]) -> None:
+    profiler = profiling.active()
+    if profiler is not None:
+        fields = sum(len(reactant.__fields__) for reactant in reactants)
+        profiler.count(target, len(reactants), fields)
+
+
+def react(
+    class_based: bool,
+    function_based: bool,
+    viewset_based: bool,
+    workers: Optional[int],
+    check: Optional[bool],
+    force: bool,
+    stream: bool,
+    cache: bool,
+    reactants: Optional[Sequence[Type[Reactant]]],
+    concurrent: bool,
+    engine: str,
+    shard_size: Optional[int],
+    pagination: str,
+    async_based: bool,
+    serialization: str,
+) -> None:
+    """Fingerprints the reactants of every target, then renders and delivers the stale ones."""
+    if check is None:
+        check = os.environ.get("REACTANT_CHECK") == "1"
+
+    dj_classes, alchemy_classes, peewee_classes = classify_reactants(reactants)
+    base_directory = "reactant_products"
+    manifest = Manifest(base_directory)
+    products: List[Product] = []
+
+    fingerprints: Dict[str, str] = {}
+    # Only given when sharding, so that fingerprints of unsharded products still hold.
+    shard_options = {"shard_size": shard_size} if shard_size else {}
+    if dj_classes:
+        dj_options = {
+            "class_based": class_based,
+            "function_based": function_based,
+            "viewset_based": viewset_based,
+            "pagination": pagination,
+            # Only given when set, so that fingerprints without async views still hold.
+            **({"async_based": True} if async_based else {}),
+            **({"serialization": serialization} if serialization != "model" else {}),
+            **shard_options,
+        }
+        count_reactants("django", dj_classes)
+        with profiling.phase("django", "fingerprint"):
+            fingerprints["django"] = fingerprint_reactants(
+                "django", dj_classes, dj_options
+            )
+    if peewee_classes:
+        count_reactants("peewee", peewee_classes)
+        with profiling.phase("peewee", "fingerprint"):
+            fingerprints["peewee"] = fingerprint_reactants(
+                "peewee", peewee_classes, shard_options
+            )
+    if alchemy_classes:
+        count_reactants("sqla", alchemy_classes)
+        with profiling.phase("sqla", "fingerprint"):
+            fingerprints["sqla"] = fingerprint_reactants(
+                "sqla", alchemy_classes, shard_options
+            )
+
+    stale = [
+        target
+        for target, fingerprint in fingerprints.items()
+        if force or not manifest.is_fresh(target, fingerprint)
+    ]
+
+    if check:
+        check_products(stale)
+        return
+
+    # Rendering of each target, run as soon as it is found stale unless concurrent.
+    targets: List[Tuple[str, str, List[Any], Callable[[], List[Product]]]] = [
+        (
+            "django",
+            "Django",
+            dj_classes,
+            lambda: generate_django(
+                dj_classes,
+                class_based,
+                function_based,
+                viewset_based,
+                stream,
+                engine,
+                shard_size,
+                pagination,
+                async_based,
+                serialization,
+            ),
+        ),
+        (
+            "peewee",
+            "Peewee",
+            peewee_classes,
+            lambda: generate_peewee(peewee_classes, stream, engine, shard_size),
+        ),
+        (
+            "sqla",
+            "SQLAlchemy",
+            alchemy_classes,
+            lambda: generate_sqla(alchemy_classes, stream, engine, shard_size),
+        ),
+    ]
+
+    if concurrent and not can_fork():
+        secho("Concurrent generation needs fork. Generating in turn.", fg="yellow")
+    concurrent = concurrent and len(stale) > 1 and can_fork()
+
+    jobs: Dict[str, Callable[[], List[Product]]] = {}
+    for target, label, classes, job in targets:
+        if not classes:
+            secho(f"No {label} reactants found.", fg="blue")
+        elif target not in stale:
+            secho(f"{label} reactants unchanged. Skipping.", fg="blue")
+        elif concurrent:
+            jobs[target] = job
+        else:
+            products.extend(job())
+
+    if jobs:
+        deliver_concurrently(jobs, fingerprints, manifest, workers, stream, cache)
+    elif products:
+        deliver_products(products, workers, stream, cache)
+        for target, files in product_files(products).items():
+            record_target(manifest, target, fingerprints[target], files)
+        manifest.save()
+
+
+def record_target(
+    manifest: Manifest, target: str, fingerprint: str, files: List[str]
+) -> None:
+    """Records a delivered target, and removes the files it no longer produces."""
+    for file in manifest.prune(target, files):
+        secho(f"Removed {file}, which is no longer generated.", fg="yellow")
+    manifest.update(target, fingerprint, files)
+
+
+def deliver_concurrently(
+    jobs: Dict[str, Callable[[], List[Product]]],
+    fingerprints: Dict[str, str],
+    manifest: Manifest,
+    workers: Optional[int],
+    stream: bool,
+    cache: bool,
+) -> None:
+    """
+    Generates every target in its own process, then reports each target's output
+    in order. The manifest is updated for the targets that succeeded only.
+    """
+    failed = []
+    profiler = profiling.active()
+    for result in run_targets(jobs, workers, stream, cache):
+        sys.stdout.write(result.output)
+        if profiler is not None and result.profile is not None:
+            profiler.targets[result.target] = result.profile
+        if result.error is not None:
+            secho(result.error, fg="red", nl=False)
+            failed.append(result.target)
+        else:
+            record_target(
+                manifest, result.target, fingerprints[result.target], result.files
+            )
+    manifest.save()
+
+    if failed:
+        raise GenerationFailed(failed)
@@ -0,0 +1,68 @@
+from typing import Any, Callable, Iterable, Iterator, List, Optional
+
+from jinja2 import BytecodeCache, Environment, FileSystemBytecodeCache, PackageLoader
+
+from reactant import profiling
+from reactant.exceptions import RenderFailed
+from reactant.utils import get_cache_directory
+
+
+def _bytecode_cache() -> Optional[BytecodeCache]:
+    """Compiled templates are kept on disk so new processes skip Jinja compilation."""
+    try:
+        directory = get_cache_directory("jinja")
+    except OSError:
+        return None
+    return FileSystemBytecodeCache(str(directory))
+
+
+# Shared by every combustion chamber.
+env = Environment(
+    loader=PackageLoader("reactant"),
+    trim_blocks=True,
+    bytecode_cache=_bytecode_cache(),
+)
+
+
+class LazyModels:
+    """Iterable of models that introspects the reactants again on every iteration."""
+
+    def __init__(self, factory: Callable[[], Iterator[Any]]) -> None:
+        self.factory = factory
+
+    def __iter__(self) -> Iterator[Any]:
+        return self.factory()
+
+
+def render_chunks(
+    template_name: str,
+    item_name: str,
+    items: Iterable[Any] = (),
+    emit: Optional[Callable[[Any], Optional[str]]] = None,
+    **context: Any,
+) -> Iterator[str]:
+    """
+    Lazily renders a template as its header followed by one chunk per item.
+    Templates define a `chunk` macro for a single item and call it for every item
+    in their body, so the joined chunks equal a full render of the template.
+    With `emit`, an item's chunk is emitted natively (see reactant.renderer.emitter)
+    and the macro is only rendered for the items that `emit` gives up on.
+    """
+    try:
+        module = env.get_template(template_name).make_module(context)
+        yield str(module)
+        for item in items:
+            code = emit(item) if emit is not None else None
+            if code is None:
+                code = module.chunk(item)  # type: ignore[attr-defined]
+            yield code
+    except Exception:
+        raise RenderFailed(item_name)
+
+
+def render_now(directory: str, item_name: str, chunks: Iterable[str]) -> List[str]:
+    """
+    Renders every chunk of a file right away, timed as its render phase, so that
+    render errors are raised by the chamber instead of while formatting.
+    """
+    return list(profiling.timed(directory, "render", item_name, chunks))
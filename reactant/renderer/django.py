@@ -1,187 +1,356 @@
-from pathlib import Path
-from typing import Any, List, Tuple, Type
+from functools import partial
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Type
 
-from black import FileMode, format_str
-from click import secho
-from jinja2 import Environment, PackageLoader
-
-from reactant.exceptions import RenderFailed
+from reactant import profiling
+from reactant.exceptions import InvalidBatchSize, InvalidPagination
 from reactant.main import DjangoORM
 from reactant.orm.django import DjangoCombustor, DjangoModel
-from reactant.utils import convert_to_snake
+from reactant.orm.ir import ModelIR, describe_model
+from reactant.products import Product
+from reactant.renderer import LazyModels, render_chunks, render_now
+from reactant.renderer.emitter import emit_django_model
+from reactant.renderer.shards import shard_locations, shard_reactants
+
+# Rows per page of the list endpoints of reactants whose Config sets no page_size.
+DEFAULT_PAGE_SIZE = 100
 
-env = Environment(
-    loader=PackageLoader("reactant"),
-    trim_blocks=True,
-)
+# Rows per query of the bulk endpoints of reactants whose Config sets no batch_size.
+DEFAULT_BATCH_SIZE = 1000
 
 
 class DjangoCombustionChamber:
     """This class contains methods for rendering the files. Processes DjangoORM subclasses."""
 
+    label = "Django"
+    directory = "reactant_products/django"
+
     def __init__(self, reactants: List[Type[DjangoORM]]) -> None:
         self.reactants = reactants
 
-    def get_models(self) -> List[DjangoModel]:
-        models = []
+    def iter_models(
+        self,
+        reactants: Optional[Sequence[Type[DjangoORM]]] = None,
+        cache: bool = True,
+    ) -> Iterator[DjangoModel]:
+        for reactant in self.reactants if reactants is None else reactants:
+            with profiling.phase(self.directory, "introspection"):
+                model = DjangoCombustor.generate_django_orm_model(reactant, cache)
+            yield model
+
+    def iter_names(self) -> Iterator[ModelIR]:
+        """Describes the reactants for the views and urls, without caching them."""
         for reactant in self.reactants:
-            try:
-                model = DjangoCombustor.generate_django_orm_model(reactant)
-                models.append(model)
-            except Exception:
-                raise
-        return models
+            with profiling.phase(self.directory, "introspection"):
+                model = describe_model(reactant, cache=False)
+            yield model
+
+    def get_models(self) -> List[DjangoModel]:
+        return list(self.iter_models())
 
     def render_manager(
         self,
         class_based: bool = True,
         function_based: bool = True,
         viewset_based: bool = True,
-    ) -> None:
-        """Invokes render_* methods then pass the rendered template strings to writing the file."""
+        stream: bool = False,
+        engine: str = "jinja",
+        shard_size: Optional[int] = None,
+        pagination: str = "cursor",
+        async_based: bool = False,
+        serialization: str = "model",
+    ) -> List[Product]:
+        """
+        Invokes render_* methods then collects the rendered template chunks for formatting and writing.
+        When streaming, models are introspected lazily while each file is written.
+        With the "native" engine, models are emitted already formatted.
+        With `shard_size`, models are written as a package of modules instead of models.py.
+        List endpoints are paginated by cursor, or by page number with "page_number".
+        With `async_based`, async function-based views and their urls are rendered too.
+        With "values" `serialization`, list endpoints read rows with values() and
+        render them with a faster JSON renderer (renderers.py).
+        """
         try:
-            models = self.get_models()
-            model_names = [model.name for model in models]
+            models: Iterable[DjangoModel]
+            # Names of the models, shared by the views and urls.
+            names: Iterable[ModelIR]
+            if stream:
+                models = LazyModels(partial(self.iter_models, cache=False))
+                names = LazyModels(self.iter_names)
+            else:
+                models = self.get_models()
+                names = [describe_model(reactant) for reactant in self.reactants]
 
-            models_code, models_name_str = self.render_models(models)
-            serializers_code, serializers_name_str = self.render_serializers(
-                models, model_names
-            )
-            self.write_to_file(models_code, models_name_str)
-            self.write_to_file(serializers_code, serializers_name_str)
+            if shard_size:
+                rendered = self.render_models_package(
+                    models, shard_size, stream, engine
+                )
+            else:
+                rendered = [self.render_models(models, engine)]
+            rendered.append(self.render_serializers(names, serialization))
+            rendered.append(self.render_pagination(names, pagination))
+            if serialization == "values":
+                rendered.append(self.render_renderers())
 
             if class_based:
-                views_code, views_name_str = self.render_views_class(model_names)
-                urls_code, urls_name_str = self.render_urls_class(model_names)
-                self.write_to_file(views_code, views_name_str)
-                self.write_to_file(urls_code, urls_name_str)
+                rendered.append(self.render_views_class(names, serialization))
+                rendered.append(self.render_urls_class(names))
 
             if function_based:
-                views_func_code, views_func_name_str = self.render_views_func(
-                    model_names
-                )
-                urls_func_code, urls_func_name_str = self.render_urls_func(model_names)
-                self.write_to_file(views_func_code, views_func_name_str)
-                self.write_to_file(urls_func_code, urls_func_name_str)
+                rendered.append(self.render_views_func(names, serialization))
+                rendered.append(self.render_urls_func(names))
 
             if viewset_based:
-                views_code, viewset_name_str = self.render_views_viewset(model_names)
-                urls_viewset_code, urls_viewset_name_str = self.render_urls_viewset(
-                    model_names
-                )
-                self.write_to_file(views_code, viewset_name_str)
-                self.write_to_file(urls_viewset_code, urls_viewset_name_str)
+                rendered.append(self.render_views_viewset(names, serialization))
+                rendered.append(self.render_urls_viewset(names))
+
+            if async_based:
+                rendered.append(self.render_views_async(names, serialization))
+                rendered.append(self.render_urls_async(names))
 
         except Exception:
             raise
+        else:
+            return [
+                self.make_product(chunks, item_name, stream)
+                for chunks, item_name in rendered
+            ]
 
-    def render_models(self, models: List[DjangoModel]) -> Tuple[str, str]:
+    def render_models(
+        self, models: Iterable[DjangoModel], engine: str = "jinja"
+    ) -> Tuple[Iterator[str], str]:
         item_name = "models"
-        try:
-            template_models = env.get_template("django_models.txt.jinja")
-            output_models = template_models.render(models=models)
-        except Exception:
-            raise RenderFailed(item_name)
-        else:
-            return (output_models, item_name)
+        emit = emit_django_model if engine == "native" else None
+        output_models = render_chunks(
+            "django_models.txt.jinja", item_name, models, emit=emit
+        )
+        return (output_models, item_name)
+
+    def render_models_package(
+        self,
+        models: Iterable[DjangoModel],
+        shard_size: int,
+        stream: bool = False,
+        engine: str = "jinja",
+    ) -> List[Tuple[Iterator[str], str]]:
+        """
+        Renders every shard of the models package as its own file, then the package's
+        __init__ that re-exports them. Relations to a model of another shard are lazy
+        references by name, so shards never import each other.
+        """
+        shards = shard_reactants(self.reactants, shard_size, cache=not stream)
+        locations = shard_locations(shards)
+        built = [] if stream else list(models)
+        rendered = []
+        for index, shard in enumerate(shards):
+            shard_models: Iterable[DjangoModel]
+            if stream:
+                reactants = [self.reactants[position] for position in shard.members]
+                shard_models = LazyModels(
+                    partial(self.iter_shard_models, reactants, index, locations, False)
+                )
+            else:
+                shard_models = [
+                    self.localize_model(built[position], index, locations)
+                    for position in shard.members
+                ]
+            item_name = f"models/{shard.name}"
+            output_shard = render_chunks(
+                "django_models_shard.txt.jinja",
+                item_name,
+                shard_models,
+                emit=emit_django_model if engine == "native" else None,
+            )
+            rendered.append((output_shard, item_name))
 
-    def render_views_class(self, model_names: List[str]) -> Tuple[str, str]:
+        item_name = "models/__init__"
+        output_init = render_chunks(
+            "package_init.txt.jinja", item_name, shards=shards, base=[]
+        )
+        rendered.append((output_init, item_name))
+        return rendered
+
+    def iter_shard_models(
+        self,
+        reactants: Sequence[Type[DjangoORM]],
+        index: int,
+        locations: Dict[str, int],
+        cache: bool = True,
+    ) -> Iterator[DjangoModel]:
+        for model in self.iter_models(reactants, cache):
+            yield self.localize_model(model, index, locations)
+
+    @staticmethod
+    def localize_model(
+        model: DjangoModel, index: int, locations: Dict[str, int]
+    ) -> DjangoModel:
+        """Turns relations to models of other shards into lazy references by name."""
+        fields = [
+            (
+                field._replace(relation=f'"{field.relation}"')
+                if locations.get(field.relation or "", index) != index
+                else field
+            )
+            for field in model.fields
+        ]
+        return model._replace(fields=fields)
+
+    def render_views_class(
+        self, names: Iterable[ModelIR], serialization: str = "model"
+    ) -> Tuple[Iterator[str], str]:
         item_name = "views_class"
-        try:
-            template_views = env.get_template("django_views_class.txt.jinja")
-            output_views = template_views.render(names=model_names)
-        except Exception:
-            raise RenderFailed(item_name)
-        else:
-            return (output_views, item_name)
+        output_views = render_chunks(
+            "django_views_class.txt.jinja",
+            item_name,
+            names,
+            models=names,
+            serialization=serialization,
+        )
+        return (output_views, item_name)
 
-    def render_views_func(self, model_names: List[str]) -> Tuple[str, str]:
+    def render_views_func(
+        self, names: Iterable[ModelIR], serialization: str = "model"
+    ) -> Tuple[Iterator[str], str]:
         item_name = "views_func"
-        try:
-            snaked_model_names = [convert_to_snake(name) for name in model_names]
-            paired_names = dict(zip(model_names, snaked_model_names))
-            template_views_func = env.get_template("django_views_func.txt.jinja")
-            output_views_func = template_views_func.render(names=paired_names)
-        except Exception:
-            raise RenderFailed(item_name)
-        else:
-            return (output_views_func, item_name)
+        output_views_func = render_chunks(
+            "django_views_func.txt.jinja",
+            item_name,
+            names,
+            models=names,
+            serialization=serialization,
+        )
+        return (output_views_func, item_name)
 
-    def render_views_viewset(self, model_names: List[str]) -> Tuple[str, str]:
+    def render_views_viewset(
+        self, names: Iterable[ModelIR], serialization: str = "model"
+    ) -> Tuple[Iterator[str], str]:
         item_name = "views_modelviewset"
-        try:
-            snaked_model_names = [convert_to_snake(name) for name in model_names]
-            paired_names = dict(zip(model_names, snaked_model_names))
-            template_views_viewset = env.get_template(
-                "django_views_model_view_set.txt.jinja"
-            )
-            output_views_viewset = template_views_viewset.render(names=paired_names)
-        except Exception:
-            raise RenderFailed(item_name)
-        else:
-            return (output_views_viewset, item_name)
+        output_views_viewset = render_chunks(
+            "django_views_model_view_set.txt.jinja",
+            item_name,
+            names,
+            models=names,
+            serialization=serialization,
+        )
+        return (output_views_viewset, item_name)
+
+    def render_views_async(
+        self, names: Iterable[ModelIR], serialization: str = "model"
+    ) -> Tuple[Iterator[str], str]:
+        item_name = "views_async"
+        output_views_async = render_chunks(
+            "django_views_async.txt.jinja",
+            item_name,
+            names,
+            models=names,
+            serialization=serialization,
+        )
+        return (output_views_async, item_name)
 
     def render_serializers(
-        self, models: List[DjangoModel], model_names: List[str]
-    ) -> Tuple[str, str]:
+        self, names: Iterable[ModelIR], serialization: str = "model"
+    ) -> Tuple[Iterator[str], str]:
+        """
+        Model serializers read and write every row, unless the "values" `serialization`
+        also gives each model a serializer of the rows of its list endpoints.
+        """
         item_name = "serializers"
-        try:
-            template_serializers = env.get_template("django_serializers.txt.jinja")
-            output_serializers = template_serializers.render(
-                models=models, names=model_names
-            )
-        except Exception:
-            raise RenderFailed(item_name)
-        else:
-            return (output_serializers, item_name)
+        for model in names:
+            batch_size = model.batch_size
+            if batch_size is not None and (
+                type(batch_size) is not int or batch_size < 1
+            ):
+                raise InvalidBatchSize(model.name, batch_size)
+        output_serializers = render_chunks(
+            "django_serializers.txt.jinja",
+            item_name,
+            names,
+            models=names,
+            default_batch_size=DEFAULT_BATCH_SIZE,
+            serialization=serialization,
+        )
+        return (output_serializers, item_name)
+
+    def render_renderers(self) -> Tuple[Iterator[str], str]:
+        item_name = "renderers"
+        output_renderers = render_chunks("django_renderers.txt.jinja", item_name)
+        return (output_renderers, item_name)
 
-    def render_urls_class(self, model_names: List[str]) -> Tuple[str, str]:
+    def render_pagination(
+        self, names: Iterable[ModelIR], pagination: str = "cursor"
+    ) -> Tuple[Iterator[str], str]:
+        item_name = "pagination"
+        for model in names:
+            self.check_pagination(model)
+        output_pagination = render_chunks(
+            "django_pagination.txt.jinja",
+            item_name,
+            names,
+            pagination=pagination,
+            default_page_size=DEFAULT_PAGE_SIZE,
+        )
+        return (output_pagination, item_name)
+
+    @staticmethod
+    def check_pagination(model: ModelIR) -> None:
+        """The page_size and ordering of a reactant's Config must fit its model."""
+        page_size = model.page_size
+        if page_size is not None and (type(page_size) is not int or page_size < 1):
+            raise InvalidPagination(model.name, "page_size", page_size)
+        ordering = model.ordering
+        if ordering is None:
+            return
+        # Rows are ordered by the primary key or a field, descending with "-".
+        orderable = {"pk", "id", *(field.name for field in model.fields)}
+        if not isinstance(ordering, str) or ordering.lstrip("-") not in orderable:
+            raise InvalidPagination(model.name, "ordering", ordering)
+
+    def render_urls_class(self, names: Iterable[ModelIR]) -> Tuple[Iterator[str], str]:
         item_name = "urls_class"
-        try:
-            snaked_model_names = [convert_to_snake(name) for name in model_names]
-            paired_names = dict(zip(model_names, snaked_model_names))
-            template_urls = env.get_template("django_urls_class.txt.jinja")
-            output_urls = template_urls.render(names=paired_names)
-        except Exception:
-            raise RenderFailed(item_name)
-        else:
-            return (output_urls, item_name)
+        output_urls = render_chunks(
+            "django_urls_class.txt.jinja", item_name, models=names
+        )
+        return (output_urls, item_name)
 
-    def render_urls_func(self, model_names: List[str]) -> Tuple[str, str]:
+    def render_urls_func(self, names: Iterable[ModelIR]) -> Tuple[Iterator[str], str]:
         item_name = "urls_func"
-        try:
-            snaked_model_names = [convert_to_snake(name) for name in model_names]
-            template_urls = env.get_template("django_urls_func.txt.jinja")
-            output_urls_func = template_urls.render(names=snaked_model_names)
-        except Exception:
-            raise RenderFailed(item_name)
-        else:
-            return (output_urls_func, item_name)
+        output_urls_func = render_chunks(
+            "django_urls_func.txt.jinja", item_name, models=names
+        )
+        return (output_urls_func, item_name)
 
-    def render_urls_viewset(self, model_names: List[str]) -> Tuple[str, str]:
-        item_name = "urls_viewset"
-        try:
-            snaked_model_names = [convert_to_snake(name) for name in model_names]
-            paired_names = dict(zip(model_names, snaked_model_names))
-            template_urls = env.get_template("django_urls_router.txt.jinja")
-            output_urls = template_urls.render(names=paired_names)
-        except Exception:
-            raise RenderFailed(item_name)
-        else:
-            return (output_urls, item_name)
+    def render_urls_async(self, names: Iterable[ModelIR]) -> Tuple[Iterator[str], str]:
+        """
+        Async views are routed like the function-based ones they mirror, from
+        views_async.py instead of views.py.
+        """
+        item_name = "urls_async"
+        output_urls_async = render_chunks(
+            "django_urls_func.txt.jinja",
+            item_name,
+            models=names,
+            views_module="views_async",
+        )
+        return (output_urls_async, item_name)
 
-    def write_to_file(self, item: Any, item_name: str) -> None:
-        """Rendered template strings are formatted before writing."""
-        try:
-            p = Path("reactant_products/django")
-            p.mkdir(parents=True, exist_ok=True)
-            formatted_code = format_str(item, mode=FileMode())
-            with open(f"{p}/{item_name}.py", "w") as file:
-                file.write(formatted_code)
-        except Exception:
-            raise
-        else:
-            self._success_secho(item_name)
+    def render_urls_viewset(
+        self, names: Iterable[ModelIR]
+    ) -> Tuple[Iterator[str], str]:
+        item_name = "urls_viewset"
+        output_urls = render_chunks(
+            "django_urls_router.txt.jinja", item_name, models=names
+        )
+        return (output_urls, item_name)
 
-    def _success_secho(self, item_name: str):
-        return secho(f"Django {item_name}.py finished rendering.", fg="green")
+    def make_product(
+        self, chunks: Iterator[str], item_name: str, stream: bool = False
+    ) -> Product:
+        """
+        Rendered template chunks are formatted by the shared stage before writing.
+        Unless streaming, they are rendered here, so render errors are reported as such.
+        """
+        return Product(
+            label=self.label,
+            directory=self.directory,
+            item_name=item_name,
+            chunks=chunks if stream else render_now(self.directory, item_name, chunks),
+        )
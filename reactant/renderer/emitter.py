@@ -0,0 +1,316 @@
+"""
+Native emitter of model code. Instead of rendering a template and formatting it
+with black, the model chunks are written directly in the layout black gives them.
+Whenever a chunk is not certain to be laid out like black would (e.g. a line that
+black would wrap differently, or a value whose spelling black normalizes), the
+emitter gives up on it and the template chunk is formatted with black as usual.
+"""
+
+import keyword
+import math
+import re
+from typing import Any, Callable, List, Optional, Sequence, TypeVar
+
+from jinja2.utils import htmlsafe_json_dumps
+
+from reactant.orm.django import DjangoModel
+from reactant.orm.ir import IndexIR, Options
+from reactant.orm.peewee import PeeweeModel
+from reactant.orm.sqla import (
+    SQLAlchemyModel,
+    SQLAlchemyModelField,
+    SQLAlchemyRelationship,
+)
+from reactant.products import FormattedCode
+
+LINE_LENGTH = 88
+INDENT = "    "
+
+_FLOAT = re.compile(r"-?\d+\.\d+")
+
+T = TypeVar("T")
+
+
+class NotCanonical(Exception):
+    """The emitter cannot tell how black would lay out a chunk."""
+
+
+def literal(value: Any) -> str:
+    """The code of a field option value, spelled like the templates then black do."""
+    if isinstance(value, str):
+        code = str(htmlsafe_json_dumps(value))
+        # black prefers single quotes around strings with escaped double quotes.
+        if '\\"' in code:
+            raise NotCanonical(value)
+        return code
+    if value is None or value is Ellipsis or type(value) in (bool, int):
+        return str(value)
+    if type(value) is float and math.isfinite(value) and _FLOAT.fullmatch(str(value)):
+        return str(value)
+    raise NotCanonical(value)
+
+
+def name(value: Optional[str]) -> str:
+    if not value or not value.isidentifier() or keyword.iskeyword(value):
+        raise NotCanonical(value)
+    return value
+
+
+def reference(value: Optional[str]) -> str:
+    """A related model, by name or as a lazy reference to its name."""
+    if value and value[0] == value[-1] == '"':
+        return f'"{name(value[1:-1])}"'
+    return name(value)
+
+
+def keywords(extras: Sequence[Any]) -> List[str]:
+    return [f"{name(key)}={literal(value)}" for key, value in extras]
+
+
+def sequence(values: Sequence[Any]) -> str:
+    return f"[{', '.join(literal(value) for value in values)}]"
+
+
+def fits(line: str) -> bool:
+    return len(line) <= LINE_LENGTH
+
+
+def call(depth: int, head: str, arguments: Sequence[str], tail: str = "") -> List[str]:
+    """
+    Lines of `head(arguments)tail` as black lays them out: on one line if it fits,
+    else with the arguments on a line of their own, else one argument per line with
+    a trailing comma.
+    """
+    indent = INDENT * depth
+    inner = INDENT * (depth + 1)
+    joined = ", ".join(arguments)
+    line = f"{indent}{head}({joined}){tail}"
+    if fits(line):
+        return [line]
+    if arguments and fits(f"{inner}{joined}"):
+        return [f"{indent}{head}(", f"{inner}{joined}", f"{indent}){tail}"]
+    if len(arguments) < 2:
+        raise NotCanonical(head)
+
+    lines = [f"{indent}{head}("]
+    lines.extend(f"{inner}{argument}," for argument in arguments)
+    if not all(fits(line) for line in lines):
+        raise NotCanonical(head)
+    lines.append(f"{indent}){tail}")
+    return lines
+
+
+def chunk(lines: Sequence[str]) -> FormattedCode:
+    # black splits any line that is too long.
+    if not all(fits(line) for line in lines):
+        raise NotCanonical(lines[0])
+    code = "\n".join(lines) + "\n"
+    # black measures wide characters differently, so only ASCII is emitted.
+    if not code.isascii():
+        raise NotCanonical(code)
+    return FormattedCode(code)
+
+
+def emitting(emit: Callable[[T], FormattedCode]) -> Callable[[T], Optional[str]]:
+    """Returns None instead of a chunk that is not certain to be canonical."""
+
+    def emit_chunk(model: T) -> Optional[str]:
+        try:
+            return emit(model)
+        except NotCanonical:
+            return None
+
+    return emit_chunk
+
+
+def django_index(index: IndexIR) -> List[str]:
+    arguments = [f"fields={sequence(index.fields)}", f"name={literal(index.name)}"]
+    if index.where:
+        arguments.append(f"condition=models.Q({', '.join(keywords(index.where))})")
+    return arguments
+
+
+def django_meta(model: DjangoModel) -> List[str]:
+    """The Meta of a model with indexes. Its lists always have one item per line."""
+    lines = ["", f"{INDENT}class Meta:"]
+    for option, index_class, unique in [
+        ("indexes", "models.Index", False),
+        ("constraints", "models.UniqueConstraint", True),
+    ]:
+        indexes = [index for index in model.indexes if index.unique == unique]
+        if not indexes:
+            continue
+        lines.append(f"{INDENT * 2}{option} = [")
+        for index in indexes:
+            lines.extend(call(3, index_class, django_index(index), tail=","))
+        lines.append(f"{INDENT * 2}]")
+    return lines
+
+
+@emitting
+def emit_django_model(model: DjangoModel) -> FormattedCode:
+    if not model.fields:
+        raise NotCanonical(model.name)
+    lines = [f"class {name(model.name)}(models.Model):"]
+    for field in model.fields:
+        arguments = []
+        if field.relation:
+            arguments.append(reference(field.relation))
+            if field.on_delete:
+                arguments.append(f"on_delete={field.on_delete}")
+        arguments.extend(keywords(field.extras))
+        head = f"{name(field.name)} = models.{name(field.type)}"
+        lines.extend(call(1, head, arguments))
+    if model.indexes:
+        lines.extend(django_meta(model))
+    return chunk(lines)
+
+
+def peewee_condition(model: PeeweeModel, where: Options) -> str:
+    terms = []
+    for field, value in where:
+        column = f"{model.name}.{name(field)}"
+        if value is None:
+            terms.append(f"{column}.is_null()")
+        elif len(where) == 1:
+            terms.append(f"{column} == {literal(value)}")
+        else:
+            terms.append(f"({column} == {literal(value)})")
+    return " & ".join(terms)
+
+
+def peewee_index(model: PeeweeModel, index: IndexIR) -> List[str]:
+    arguments = [f"{model.name}.{name(field)}" for field in index.fields]
+    arguments.append(f"name={literal(index.name)}")
+    if index.unique:
+        arguments.append("unique=True")
+    if index.where:
+        arguments.append(f"where={peewee_condition(model, index.where)}")
+    return arguments
+
+
+@emitting
+def emit_peewee_model(model: PeeweeModel) -> FormattedCode:
+    if not model.fields:
+        raise NotCanonical(model.name)
+    lines = [f"class {name(model.name)}(BaseModel):"]
+    for field in model.fields:
+        arguments = [reference(field.relation)] if field.relation else []
+        arguments.extend(keywords(field.extras))
+        lines.extend(call(1, f"{name(field.name)} = {name(field.type)}", arguments))
+    if model.indexes:
+        lines.extend(["", ""])
+    for index in model.indexes:
+        lines.extend(call(0, f"{model.name}.add_index", peewee_index(model, index)))
+    return chunk(lines)
+
+
+def sqla_column_type(field: SQLAlchemyModelField) -> List[str]:
+    if field.relation:
+        name(field.relation)
+        table = literal(f"{field.relation_snake_name}.id")
+        return ["Integer", f"ForeignKey({table})"]
+    if field.type == "String" and field.length is not None:
+        return [f"String({literal(field.length)})"]
+    return [name(field.type)]
+
+
+def sqla_condition(where: Options) -> str:
+    terms = [
+        (
+            f"column({literal(field)}).is_(None)"
+            if value is None
+            else f"column({literal(field)}) == {literal(value)}"
+        )
+        for field, value in where
+    ]
+    if len(terms) == 1:
+        return terms[0]
+    return f"and_({', '.join(terms)})"
+
+
+def sqla_index(index: IndexIR) -> List[str]:
+    arguments = [literal(index.name), *(literal(field) for field in index.fields)]
+    if index.unique:
+        arguments.append("unique=True")
+    if index.where:
+        condition = sqla_condition(index.where)
+        arguments.extend([f"postgresql_where={condition}", f"sqlite_where={condition}"])
+    return arguments
+
+
+def sqla_table_args(model: SQLAlchemyModel) -> List[str]:
+    """
+    The __table_args__ of a model with indexes. Like black, a tuple of one index
+    stays on one line if it fits, while longer tuples have one index per line.
+    """
+    if len(model.indexes) == 1:
+        line = f"{INDENT}__table_args__ = (Index({', '.join(sqla_index(model.indexes[0]))}),)"
+        if fits(line):
+            return [line]
+    lines = [f"{INDENT}__table_args__ = ("]
+    for index in model.indexes:
+        lines.extend(call(2, "Index", sqla_index(index), tail=","))
+    lines.append(f"{INDENT})")
+    return lines
+
+
+def sqla_relationship(relationship: SQLAlchemyRelationship) -> List[str]:
+    arguments = [literal(relationship.model)]
+    if relationship.back_populates:
+        arguments.append(f"back_populates={literal(relationship.back_populates)}")
+    if relationship.foreign_keys:
+        arguments.append(f"foreign_keys={literal(relationship.foreign_keys)}")
+    if relationship.remote_side:
+        arguments.append(f"remote_side={literal(relationship.remote_side)}")
+    arguments.append(f"lazy={literal(relationship.lazy)}")
+    return arguments
+
+
+@emitting
+def emit_sqla_declarative_model(model: SQLAlchemyModel) -> FormattedCode:
+    lines = [
+        f"class {name(model.name)}(Base):",
+        f"{INDENT}__tablename__ = {literal(model.snake_name)}",
+        *(sqla_table_args(model) if model.indexes else []),
+        "",
+        f"{INDENT}id = Column(Integer, primary_key=True)",
+    ]
+    for field in model.fields:
+        arguments = sqla_column_type(field) + keywords(field.extras)
+        lines.extend(call(1, f"{name(field.name)} = Column", arguments))
+    for relationship in model.relationships:
+        head = f"{name(relationship.name)} = relationship"
+        lines.extend(call(1, head, sqla_relationship(relationship)))
+    return chunk(lines)
+
+
+@emitting
+def emit_sqla_classical_model(model: SQLAlchemyModel) -> FormattedCode:
+    table = f"{name(model.snake_name)}_table"
+    lines = [f"class {name(model.name)}:", f"{INDENT}pass", "", ""]
+    lines.append(f"{table} = Table(")
+    lines.append(f"{INDENT}{literal(model.snake_name)},")
+    lines.append(f"{INDENT}mapper_registry.metadata,")
+    lines.append(f'{INDENT}Column("id", Integer, primary_key=True),')
+    for field in model.fields:
+        arguments = [literal(field.name), *sqla_column_type(field)]
+        arguments.extend(keywords(field.extras))
+        lines.extend(call(1, "Column", arguments, tail=","))
+    for index in model.indexes:
+        lines.extend(call(1, "Index", sqla_index(index), tail=","))
+    lines.append(")")
+    lines.append("")
+    if not model.relationships:
+        lines.extend(call(0, "mapper_registry.map_imperatively", [model.name, table]))
+        return chunk(lines)
+    # The properties always have one relationship per line, so the call is split.
+    lines.append("mapper_registry.map_imperatively(")
+    lines.extend(
+        [f"{INDENT}{model.name},", f"{INDENT}{table},", f"{INDENT}properties={{"]
+    )
+    for relationship in model.relationships:
+        head = f"{literal(name(relationship.name))}: relationship"
+        lines.extend(call(2, head, sqla_relationship(relationship), tail=","))
+    lines.extend([f"{INDENT}}},", ")"])
+    return chunk(lines)
@@ -1,72 +1,200 @@
-from pathlib import Path
-from typing import Any, Iterable, List, Tuple, Type
+from functools import partial
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Type
 
-from black import FileMode, format_str
-from click import secho
-from jinja2 import Environment, PackageLoader
-
-from reactant.exceptions import RenderFailed
+from reactant import profiling
 from reactant.main import PeeweeORM
 from reactant.orm.peewee import PeeweeCombustor, PeeweeModel
-
-env = Environment(
-    loader=PackageLoader("reactant"),
-    trim_blocks=True,
-)
+from reactant.products import Product
+from reactant.renderer import LazyModels, render_chunks, render_now
+from reactant.renderer.emitter import emit_peewee_model
+from reactant.renderer.shards import shard_locations, shard_reactants
 
 
 class PeeweeCombustionChamber:
     """This class contains methods for rendering the files. Processes PeeweeORM subclasses."""
 
+    label = "Peewee"
+    directory = "reactant_products/peewee"
+
     def __init__(self, reactants: List[Type[PeeweeORM]]) -> None:
         self.reactants = reactants
 
+    def iter_models(
+        self,
+        reactants: Optional[Sequence[Type[PeeweeORM]]] = None,
+        cache: bool = True,
+    ) -> Iterator[PeeweeModel]:
+        for reactant in self.reactants if reactants is None else reactants:
+            with profiling.phase(self.directory, "introspection"):
+                model = PeeweeCombustor.generate_peewee_orm_model(reactant, cache)
+            yield model
+
     def get_models(self) -> List[PeeweeModel]:
-        models = []
-        for reactant in self.reactants:
-            try:
-                model = PeeweeCombustor.generate_peewee_orm_model(reactant)
-                models.append(model)
-            except Exception:
-                raise
-        return models
-
-    def render_manager(self) -> None:
+        return list(self.iter_models())
+
+    def render_manager(
+        self,
+        stream: bool = False,
+        engine: str = "jinja",
+        shard_size: Optional[int] = None,
+    ) -> List[Product]:
+        """
+        Renders the model files, and the database module whose pooled database
+        the models use.
+        """
         try:
-            models = self.get_models()
-            fields_list = []
-            for model in models:
-                for field in model.fields:
-                    fields_list.append(field.type)
-            fields_set = set(fields_list)
-            models_code, models_name_str = self.render_models(models, fields_set)
-            self.write_to_file(models_code, models_name_str)
+            models: Iterable[PeeweeModel]
+            if stream:
+                models = LazyModels(partial(self.iter_models, cache=False))
+            else:
+                models = self.get_models()
+            if shard_size:
+                rendered = self.render_models_package(
+                    models, shard_size, stream, engine
+                )
+            else:
+                fields_set = sorted(
+                    {field.type for model in models for field in model.fields}
+                )
+                rendered = [self.render_models(models, fields_set, engine)]
+            rendered.append(self.render_database())
         except Exception:
             raise
+        else:
+            return [
+                self.make_product(chunks, item_name, stream)
+                for chunks, item_name in rendered
+            ]
 
     def render_models(
-        self, models: List[PeeweeModel], fields_set: Iterable
-    ) -> Tuple[str, str]:
+        self,
+        models: Iterable[PeeweeModel],
+        fields_set: Iterable,
+        engine: str = "jinja",
+    ) -> Tuple[Iterator[str], str]:
         item_name = "models"
-        try:
-            template_models = env.get_template("peewee_models.txt.jinja")
-            output_models = template_models.render(models=models, fields_set=fields_set)
-        except Exception:
-            raise RenderFailed(item_name)
-        else:
-            return (output_models, item_name)
+        output_models = render_chunks(
+            "peewee_models.txt.jinja",
+            item_name,
+            models,
+            emit=emit_peewee_model if engine == "native" else None,
+            fields_set=fields_set,
+        )
+        return (output_models, item_name)
 
-    def write_to_file(self, item: Any, item_name: str) -> None:
-        try:
-            p = Path("reactant_products/peewee")
-            p.mkdir(parents=True, exist_ok=True)
-            formatted_code = format_str(item, mode=FileMode())
-            with open(f"{p}/{item_name}.py", "w") as file:
-                file.write(formatted_code)
-        except Exception:
-            raise
-        else:
-            self._success_secho(item_name)
+    def render_database(self) -> Tuple[Iterator[str], str]:
+        item_name = "database"
+        output_database = render_chunks("peewee_database.txt.jinja", item_name)
+        return (output_database, item_name)
+
+    def render_models_package(
+        self,
+        models: Iterable[PeeweeModel],
+        shard_size: int,
+        stream: bool = False,
+        engine: str = "jinja",
+    ) -> List[Tuple[Iterator[str], str]]:
+        """
+        Renders the base module (BaseModel), every shard of the models
+        package, then the package's __init__ that re-exports them. A shard imports
+        the models of earlier shards it relates to, while relations to later shards
+        are DeferredForeignKeys, so that shards never import each other in a cycle.
+        """
+        shards = shard_reactants(self.reactants, shard_size, cache=not stream)
+        locations = shard_locations(shards)
+        built = [] if stream else list(models)
+
+        item_name = "models/base"
+        rendered = [
+            (render_chunks("peewee_models_base.txt.jinja", item_name), item_name)
+        ]
+        for index, shard in enumerate(shards):
+            shard_models: Iterable[PeeweeModel]
+            if stream:
+                reactants = [self.reactants[position] for position in shard.members]
+                shard_models = LazyModels(
+                    partial(self.iter_shard_models, reactants, index, locations, False)
+                )
+            else:
+                shard_models = [
+                    self.localize_model(built[position], index, locations)
+                    for position in shard.members
+                ]
+
+            fields_set = set()
+            imports: Dict[int, List[str]] = {}
+            for model in shard_models:
+                for field in model.fields:
+                    fields_set.add(field.type)
+                    relation = field.relation or ""
+                    relation_index = locations.get(relation, index)
+                    if field.type == "ForeignKeyField" and relation_index < index:
+                        names = imports.setdefault(relation_index, [])
+                        if relation not in names:
+                            names.append(relation)
+
+            item_name = f"models/{shard.name}"
+            output_shard = render_chunks(
+                "peewee_models_shard.txt.jinja",
+                item_name,
+                shard_models,
+                emit=emit_peewee_model if engine == "native" else None,
+                fields_set=sorted(fields_set),
+                imports=[
+                    (shards[position].name, names)
+                    for position, names in sorted(imports.items())
+                ],
+            )
+            rendered.append((output_shard, item_name))
+
+        item_name = "models/__init__"
+        output_init = render_chunks(
+            "package_init.txt.jinja",
+            item_name,
+            shards=shards,
+            base=["BaseModel", "db"],
+        )
+        rendered.append((output_init, item_name))
+        return rendered
+
+    def iter_shard_models(
+        self,
+        reactants: Sequence[Type[PeeweeORM]],
+        index: int,
+        locations: Dict[str, int],
+        cache: bool = True,
+    ) -> Iterator[PeeweeModel]:
+        for model in self.iter_models(reactants, cache):
+            yield self.localize_model(model, index, locations)
+
+    @staticmethod
+    def localize_model(
+        model: PeeweeModel, index: int, locations: Dict[str, int]
+    ) -> PeeweeModel:
+        """Turns foreign keys to models of later shards into DeferredForeignKeys."""
+        fields = [
+            (
+                field._replace(
+                    type="DeferredForeignKey", relation=f'"{field.relation}"'
+                )
+                if field.type == "ForeignKeyField"
+                and locations.get(field.relation or "", index) > index
+                else field
+            )
+            for field in model.fields
+        ]
+        return model._replace(fields=fields)
 
-    def _success_secho(self, item_name: str):
-        return secho(f"Peewee {item_name}.py finished rendering.", fg="green")
+    def make_product(
+        self, chunks: Iterator[str], item_name: str, stream: bool = False
+    ) -> Product:
+        """
+        Rendered template chunks are formatted by the shared stage before writing.
+        Unless streaming, they are rendered here, so render errors are reported as such.
+        """
+        return Product(
+            label=self.label,
+            directory=self.directory,
+            item_name=item_name,
+            chunks=chunks if stream else render_now(self.directory, item_name, chunks),
+        )
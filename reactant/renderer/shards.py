@@ -0,0 +1,56 @@
+import keyword
+from typing import Dict, List, NamedTuple, Sequence, Type
+
+from pydantic import BaseModel
+
+from reactant.exceptions import InvalidShard
+from reactant.orm.ir import describe_model
+
+# Modules of a sharded package that are not shards.
+RESERVED_MODULES = ("__init__", "base")
+
+
+class Shard(NamedTuple):
+    """A module of a sharded models package."""
+
+    name: str
+    # Positions of the shard's reactants among those of the chamber.
+    members: List[int]
+    # Names of the shard's models, re-exported by the package.
+    models: List[str]
+
+
+def shard_reactants(
+    reactants: Sequence[Type[BaseModel]], shard_size: int, cache: bool = True
+) -> List[Shard]:
+    """
+    Splits reactants into the modules of a package. A reactant goes to the module
+    named by the `shard` of its Config, else to "shard_1", "shard_2", etc. which
+    take `shard_size` reactants each. Shards keep the order of their first reactant.
+    """
+    shards: Dict[str, Shard] = {}
+    unassigned = 0
+    for position, reactant in enumerate(reactants):
+        model = describe_model(reactant, cache)
+        name = model.shard
+        if name is None:
+            name = f"shard_{unassigned // shard_size + 1}"
+            unassigned += 1
+        elif (
+            not isinstance(name, str)
+            or not name.isidentifier()
+            or keyword.iskeyword(name)
+            or name in RESERVED_MODULES
+        ):
+            raise InvalidShard(model.name, name)
+        shard = shards.setdefault(name, Shard(name, [], []))
+        shard.members.append(position)
+        shard.models.append(model.name)
+    return list(shards.values())
+
+
+def shard_locations(shards: Sequence[Shard]) -> Dict[str, int]:
+    """Position of the shard of every model, by model name."""
+    return {
+        model: index for index, shard in enumerate(shards) for model in shard.models
+    }
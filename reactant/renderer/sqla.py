@@ -1,94 +1,225 @@
-from pathlib import Path
-from typing import Any, Iterable, List, Tuple, Type
-
-from black import FileMode, format_str
-from click import secho
-from jinja2 import Environment, PackageLoader
+from functools import partial
+from typing import (
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    Type,
+)
 
-from reactant.exceptions import RenderFailed
+from reactant import profiling
 from reactant.main import SQLAlchemyORM
-from reactant.orm.sqla import SQLAlchemyCombustor, SQLAlchemyModel
-from reactant.utils import convert_to_snake
-
-env = Environment(
-    loader=PackageLoader("reactant"),
-    trim_blocks=True,
+from reactant.orm.sqla import (
+    SQLAlchemyCombustor,
+    SQLAlchemyModel,
+    SQLAlchemyRelationship,
+)
+from reactant.products import Product
+from reactant.renderer import LazyModels, render_chunks, render_now
+from reactant.renderer.emitter import (
+    emit_sqla_classical_model,
+    emit_sqla_declarative_model,
 )
+from reactant.renderer.shards import shard_reactants
 
 
 class SQLAlchemyCombustionChamber:
     """This class contains methods for rendering the files. Processes SQLAlchemyORM subclasses."""
 
+    label = "SQLAlchemy"
+    directory = "reactant_products/sqla"
+
     def __init__(self, reactants: List[Type[SQLAlchemyORM]]) -> None:
         self.reactants = reactants
+        self._relationships: Optional[Dict[str, List[SQLAlchemyRelationship]]] = None
+
+    def get_relationships(
+        self, cache: bool = True
+    ) -> Dict[str, List[SQLAlchemyRelationship]]:
+        """Relationships between all reactants, so that each side has the other."""
+        if self._relationships is None:
+            with profiling.phase(self.directory, "introspection"):
+                self._relationships = SQLAlchemyCombustor.describe_relationships(
+                    self.reactants, cache
+                )
+        return self._relationships
+
+    def iter_models(
+        self,
+        reactants: Optional[Sequence[Type[SQLAlchemyORM]]] = None,
+        cache: bool = True,
+    ) -> Iterator[SQLAlchemyModel]:
+        relationships = self.get_relationships(cache)
+        for reactant in self.reactants if reactants is None else reactants:
+            with profiling.phase(self.directory, "introspection"):
+                model = SQLAlchemyCombustor.generate_sqla_orm_models(
+                    reactant, relationships, cache
+                )
+            yield model
 
     def get_models(self) -> List[SQLAlchemyModel]:
-        models = []
-        for reactant in self.reactants:
-            try:
-                model = SQLAlchemyCombustor.generate_sqla_orm_models(reactant)
-                models.append(model)
-            except Exception:
-                raise
-        return models
-
-    def render_manager(self) -> None:
-        models = self.get_models()
-        fields_list = []
-        for model in models:
-            for field in model.fields:
-                fields_list.append(field.type)
-        fields_set = set(fields_list)
+        return list(self.iter_models())
+
+    def render_manager(
+        self,
+        stream: bool = False,
+        engine: str = "jinja",
+        shard_size: Optional[int] = None,
+    ) -> List[Product]:
+        models: Iterable[SQLAlchemyModel]
+        if stream:
+            models = LazyModels(partial(self.iter_models, cache=False))
+        else:
+            models = self.get_models()
+
+        if shard_size:
+            rendered = [
+                *self.render_models_package(
+                    models, shard_size, "declarative", stream, engine
+                ),
+                *self.render_models_package(
+                    models, shard_size, "classical", stream, engine
+                ),
+                self.render_database(),
+            ]
+            return [
+                self.make_product(chunks, item_name, stream)
+                for chunks, item_name in rendered
+            ]
+
+        fields_set = self.import_names(models)
 
         dec_models_code, dec_name_str = self.render_declarative_models(
-            models, fields_set
+            models, fields_set, engine
         )
         clas_models_code, clas_name_str = self.render_classical_models(
-            models, fields_set
+            models, fields_set, engine
         )
 
-        self.write_to_file(dec_models_code, dec_name_str)
-        self.write_to_file(clas_models_code, clas_name_str)
+        return [
+            self.make_product(dec_models_code, dec_name_str, stream),
+            self.make_product(clas_models_code, clas_name_str, stream),
+            self.make_product(*self.render_database(), stream),
+        ]
+
+    @staticmethod
+    def import_names(models: Iterable[SQLAlchemyModel]) -> List[str]:
+        """Names that the models use from sqlalchemy: column types, and index constructs."""
+        names: Set[str] = set()
+        for model in models:
+            names.update(field.type for field in model.fields)
+            for index in model.indexes:
+                names.add("Index")
+                if index.where:
+                    names.add("column")
+                if len(index.where) > 1:
+                    names.add("and_")
+        return sorted(names)
 
     def render_declarative_models(
-        self, models: List[SQLAlchemyModel], fields_set: Iterable
-    ) -> Tuple[str, str]:
+        self,
+        models: Iterable[SQLAlchemyModel],
+        fields_set: Iterable,
+        engine: str = "jinja",
+    ) -> Tuple[Iterator[str], str]:
         item_name = "declarative_models"
-        try:
-            template_mod = env.get_template("sqla_models_declarative.txt.jinja")
-            output_dec_models = template_mod.render(
-                models=models, convert_to_snake=convert_to_snake, fields_set=fields_set
-            )
-        except Exception:
-            raise RenderFailed(item_name)
-        else:
-            return (output_dec_models, item_name)
+        output_dec_models = render_chunks(
+            "sqla_models_declarative.txt.jinja",
+            item_name,
+            models,
+            emit=emit_sqla_declarative_model if engine == "native" else None,
+            fields_set=fields_set,
+        )
+        return (output_dec_models, item_name)
 
     def render_classical_models(
-        self, models: List[SQLAlchemyModel], fields_set: Iterable
-    ) -> Tuple[str, str]:
+        self,
+        models: Iterable[SQLAlchemyModel],
+        fields_set: Iterable,
+        engine: str = "jinja",
+    ) -> Tuple[Iterator[str], str]:
         item_name = "classical_models"
-        try:
-            template_mod = env.get_template("sqla_models_classical.txt.jinja")
-            output_clas_models = template_mod.render(
-                models=models, convert_to_snake=convert_to_snake, fields_set=fields_set
+        output_clas_models = render_chunks(
+            "sqla_models_classical.txt.jinja",
+            item_name,
+            models,
+            emit=emit_sqla_classical_model if engine == "native" else None,
+            fields_set=fields_set,
+        )
+        return (output_clas_models, item_name)
+
+    def render_database(self) -> Tuple[Iterator[str], str]:
+        """The module of the engines and sessions of the models."""
+        item_name = "database"
+        output_database = render_chunks("sqla_database.txt.jinja", item_name)
+        return (output_database, item_name)
+
+    def render_models_package(
+        self,
+        models: Iterable[SQLAlchemyModel],
+        shard_size: int,
+        style: str,
+        stream: bool = False,
+        engine: str = "jinja",
+    ) -> List[Tuple[Iterator[str], str]]:
+        """
+        Renders the base module of a `style` ("declarative" or "classical"), every
+        shard of its models package, then the package's __init__ that re-exports them.
+        Foreign keys name their table, so shards never import each other.
+        """
+        shards = shard_reactants(self.reactants, shard_size, cache=not stream)
+        built = [] if stream else list(models)
+        package = f"{style}_models"
+        emit = {
+            "declarative": emit_sqla_declarative_model,
+            "classical": emit_sqla_classical_model,
+        }[style]
+
+        item_name = f"{package}/base"
+        output_base = render_chunks(f"sqla_models_{style}_base.txt.jinja", item_name)
+        rendered = [(output_base, item_name)]
+        for shard in shards:
+            shard_models: Iterable[SQLAlchemyModel]
+            if stream:
+                reactants = [self.reactants[position] for position in shard.members]
+                shard_models = LazyModels(
+                    partial(self.iter_models, reactants, cache=False)
+                )
+            else:
+                shard_models = [built[position] for position in shard.members]
+            fields_set = self.import_names(shard_models)
+            item_name = f"{package}/{shard.name}"
+            output_shard = render_chunks(
+                f"sqla_models_{style}_shard.txt.jinja",
+                item_name,
+                shard_models,
+                emit=emit if engine == "native" else None,
+                fields_set=fields_set,
             )
-        except Exception:
-            raise RenderFailed(item_name)
-        else:
-            return (output_clas_models, item_name)
-
-    def write_to_file(self, item: Any, item_name: str) -> None:
-        try:
-            p = Path("reactant_products/sqla")
-            p.mkdir(parents=True, exist_ok=True)
-            formatted_code = format_str(item, mode=FileMode())
-            with open(f"{p}/{item_name}.py", "w") as file:
-                file.write(formatted_code)
-        except Exception:
-            raise
-        else:
-            self._success_secho(item_name)
+            rendered.append((output_shard, item_name))
 
-    def _success_secho(self, item_name: str):
-        return secho(f"SQLAlchemy {item_name}.py finished rendering.", fg="green")
+        item_name = f"{package}/__init__"
+        base = "Base" if style == "declarative" else "mapper_registry"
+        output_init = render_chunks(
+            "package_init.txt.jinja", item_name, shards=shards, base=[base]
+        )
+        rendered.append((output_init, item_name))
+        return rendered
+
+    def make_product(
+        self, chunks: Iterator[str], item_name: str, stream: bool = False
+    ) -> Product:
+        """
+        Rendered template chunks are formatted by the shared stage before writing.
+        Unless streaming, they are rendered here, so render errors are reported as such.
+        """
+        return Product(
+            label=self.label,
+            directory=self.directory,
+            item_name=item_name,
+            chunks=chunks if stream else render_now(self.directory, item_name, chunks),
+        )
@@ -1,10 +1,154 @@
-import subprocess
+import glob
+import sys
+from pathlib import Path
+from typing import List, Sequence
 
 import click
 
 
-@click.command()
-@click.argument("python_file", type=click.Path(exists=True))
-def runner(python_file):
-    click.secho(f"Running {python_file}", fg="cyan")
-    subprocess.run(["python", f"{python_file}"])
+class RunnerGroup(click.Group):
+    """Runs a reactant file when the first argument is not a command, e.g. `reactant generate.py`."""
+
+    def parse_args(self, ctx, args):
+        if (
+            args
+            and args[0] not in self.commands
+            and args[0] not in ctx.help_option_names
+        ):
+            args = ["run", *args]
+        return super().parse_args(ctx, args)
+
+
+@click.group(cls=RunnerGroup)
+def runner():
+    """Generate code from the reactants of a file."""
+
+
+def expand_paths(patterns: Sequence[str]) -> List[Path]:
+    """Expands glob patterns that the shell did not, e.g. quoted "schemas/**/*.py"."""
+    paths: List[Path] = []
+    for pattern in patterns:
+        matches = sorted(glob.glob(pattern, recursive=True))
+        if not matches:
+            raise click.BadParameter(
+                f"{pattern} does not match any file.", param_hint="PYTHON_FILES"
+            )
+        paths.extend(Path(match) for match in matches if Path(match) not in paths)
+    return paths
+
+
+@runner.command()
+@click.argument("python_files", nargs=-1, required=True)
+@click.option(
+    "--check",
+    is_flag=True,
+    help="Only compare fingerprints. Exits with status 1 if the products are stale.",
+)
+@click.option(
+    "--profile",
+    is_flag=False,
+    flag_value="reactant-profile.json",
+    default=None,
+    metavar="[REPORT]",
+    help="Time each phase of generation and write a JSON report "
+    "(reactant-profile.json by default).",
+)
+@click.option(
+    "--cprofile",
+    is_flag=True,
+    help="Also dump cProfile statistics next to the profile report.",
+)
+@click.option(
+    "--concurrent",
+    is_flag=True,
+    help="Generate the products of each framework in parallel processes.",
+)
+@click.option(
+    "--engine",
+    type=click.Choice(["jinja", "native"]),
+    default=None,
+    help="Render model files from templates then format them with black (jinja), "
+    "or emit them already formatted (native).",
+)
+@click.option(
+    "--shard-size",
+    type=click.IntRange(min=1),
+    default=None,
+    help="Write model files as packages of modules of at most this many models.",
+)
+@click.option(
+    "--pagination",
+    type=click.Choice(["cursor", "page_number"]),
+    default=None,
+    help="Paginate the Django list endpoints by cursor or by page number.",
+)
+@click.option(
+    "--serialization",
+    type=click.Choice(["model", "values"]),
+    default=None,
+    help="Serialize the rows of the Django list endpoints with model serializers "
+    "(model), or read them with values() and render them with orjson (values).",
+)
+def run(
+    python_files,
+    check,
+    profile,
+    cprofile,
+    concurrent,
+    engine,
+    shard_size,
+    pagination,
+    serialization,
+):
+    """
+    Run reactant files, packages or glob patterns in this process, then generate
+    the reactants of all of them in a single pass.
+    """
+    from reactant.exceptions import StaleProducts
+    from reactant.loader import ReactantLoader
+    from reactant.reaction import generate
+
+    loader = ReactantLoader()
+    for path in expand_paths(python_files):
+        click.secho(f"Running {path}", fg="cyan")
+        loader.load(path)
+
+    options = loader.generate_options()
+    if check:
+        options["check"] = True
+    if profile:
+        options["profile"] = profile
+    if cprofile:
+        options["cprofile"] = True
+    if concurrent:
+        options["concurrent"] = True
+    if engine:
+        options["engine"] = engine
+    if shard_size:
+        options["shard_size"] = shard_size
+    if pagination:
+        options["pagination"] = pagination
+    if serialization:
+        options["serialization"] = serialization
+    try:
+        generate(**options, reactants=loader.reactants())
+    except StaleProducts:
+        sys.exit(1)
+
+
+@runner.command()
+@click.argument("path", type=click.Path(exists=True, path_type=Path))
+@click.option(
+    "--interval",
+    default=0.5,
+    show_default=True,
+    help="Seconds between checks for changed files.",
+)
+def watch(path, interval):
+    """Regenerate whenever a reactant file, package or directory changes."""
+    from reactant.watch import ReactantWatcher
+
+    try:
+        ReactantWatcher(path, interval).watch()
+    except KeyboardInterrupt:
+        click.secho("Stopped watching.", fg="cyan")
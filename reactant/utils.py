@@ -1,6 +1,24 @@
+import os
 import re
+from pathlib import Path
 
 
 def convert_to_snake(camel_input: str) -> str:
     words = re.findall(r"[A-Z]?[a-z]+|[A-Z]{2,}(?=[A-Z][a-z]|\d|\W|$)|\d+", camel_input)
     return "_".join(map(str.lower, words))
+
+
+def get_cache_directory(*parts: str) -> Path:
+    """
+    Returns (and creates) a directory inside reactant's persistent cache.
+    The cache lives in REACTANT_CACHE_DIR if set, else in the user's cache directory.
+    """
+    base = os.environ.get("REACTANT_CACHE_DIR")
+    if not base:
+        user_cache = os.environ.get("XDG_CACHE_HOME") or os.path.join(
+            os.path.expanduser("~"), ".cache"
+        )
+        base = os.path.join(user_cache, "reactant")
+    directory = Path(base, *parts)
+    directory.mkdir(parents=True, exist_ok=True)
+    return directory
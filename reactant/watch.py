@@ -0,0 +1,69 @@
+import time
+import traceback
+from pathlib import Path
+from typing import Dict, Set
+
+from click import secho
+
+from reactant.loader import ReactantLoader, source_files
+from reactant.reaction import generate
+
+
+class ReactantWatcher:
+    """
+    Keeps reactants loaded in one process and regenerates their products whenever
+    their source files change. Only changed files are loaded again, and targets
+    whose reactants did not change are skipped thanks to the manifest.
+    """
+
+    def __init__(self, path: Path, interval: float = 0.5) -> None:
+        self.path = path
+        self.interval = interval
+        self.loader = ReactantLoader()
+        self.mtimes: Dict[Path, int] = {}
+
+    def scan(self) -> Dict[Path, int]:
+        mtimes = {}
+        for file in source_files(self.path):
+            try:
+                mtimes[file] = file.stat().st_mtime_ns
+            except OSError:
+                continue
+        return mtimes
+
+    def react(self, changed: Set[Path], removed: Set[Path]) -> None:
+        start = time.perf_counter()
+        try:
+            if not self.loader.namespaces:
+                self.loader.load(self.path)
+            else:
+                self.loader.forget(removed)
+                self.loader.reload(sorted(changed))
+            generate(
+                **self.loader.generate_options(), reactants=self.loader.reactants()
+            )
+        except (Exception, SystemExit):
+            secho(traceback.format_exc(), fg="red")
+            secho("Generation failed. Waiting for changes.", fg="red")
+            return
+        elapsed = time.perf_counter() - start
+        secho(f"Generated in {elapsed:.2f}s. Waiting for changes.", fg="cyan")
+
+    def poll(self) -> None:
+        """Regenerates if source files were changed, added or removed since the last scan."""
+        mtimes = self.scan()
+        changed = {
+            file for file, mtime in mtimes.items() if self.mtimes.get(file) != mtime
+        }
+        removed = set(self.mtimes) - set(mtimes)
+        self.mtimes = mtimes
+        if changed or removed:
+            self.react(changed, removed)
+
+    def watch(self) -> None:
+        secho(f"Watching {self.path}", fg="cyan")
+        self.mtimes = self.scan()
+        self.react(set(self.mtimes), set())
+        while True:
+            time.sleep(self.interval)
+            self.poll()
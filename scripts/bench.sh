@@ -0,0 +1,3 @@
+#! /usr/bin/bash
+
+poetry run python -m benchmarks.generation "$@"
@@ -1,4 +1,4 @@
 #! /usr/bin/bash
 
-autoflake --in-place --recursive reactant && isort reactant tests && black reactant tests \
+autoflake --in-place --recursive reactant benchmarks && isort reactant tests benchmarks && black reactant tests benchmarks \
 && echo "Files now autoflaked, isorted, and black formatted."
\ No newline at end of file
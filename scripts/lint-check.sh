@@ -1,5 +1,5 @@
 #! /usr/bin/sh
 
-flake8 reactant tests
-black reactant tests --check
-isort reactant tests --check-only
\ No newline at end of file
+flake8 reactant tests benchmarks
+black reactant tests benchmarks --check
+isort reactant tests benchmarks --check-only
\ No newline at end of file
@@ -1,19 +1,153 @@
+import copy
+import json
+import os
+import shutil
+import subprocess
+import sys
+import time
+import types
 from pathlib import Path
 from typing import Optional
 
-from reactant import DjangoORM, Field, PeeweeORM, SQLAlchemyORM, __version__, generate
-from reactant.orm.django import DjangoModel
+import pytest
+from click.testing import CliRunner
+from jinja2 import FileSystemBytecodeCache
+
+from reactant import (
+    DjangoORM,
+    Field,
+    Index,
+    PeeweeORM,
+    SQLAlchemyORM,
+    __version__,
+    generate,
+    reaction,
+)
+from reactant.exceptions import (
+    GenerationFailed,
+    InvalidBatchSize,
+    InvalidIndex,
+    InvalidPagination,
+    RenderFailed,
+    StaleProducts,
+    UnsupportedFieldType,
+)
+from reactant.loader import ReactantLoader
+from reactant.manifest import Manifest, fingerprint_reactants
+from reactant.orm.django import DjangoCombustor, DjangoModel
+from reactant.orm.ir import describe_model
 from reactant.orm.peewee import PeeweeModel
+from reactant.orm.registry import TypeRegistry
 from reactant.orm.sqla import SQLAlchemyModel
+from reactant.products import (
+    ChunkCache,
+    FormattedCode,
+    Product,
+    format_chunks,
+    format_products,
+    write_products,
+)
+from reactant.profiling import Profiler
+from reactant.renderer import env, render_chunks
 from reactant.renderer.django import DjangoCombustionChamber
 from reactant.renderer.peewee import PeeweeCombustionChamber
 from reactant.renderer.sqla import SQLAlchemyCombustionChamber
+from reactant.run import runner
 
 
 def test_version():
     assert __version__ == "0.6.0"
 
 
+def django_below(version):
+    try:
+        import django
+    except ImportError:
+        return False
+    return django.VERSION < version
+
+
+# The async views use the async ORM interface, and the values serialization test
+# needs bulk_create to set primary keys on SQLite, as of the Django the README asks.
+requires_django_5 = pytest.mark.skipif(
+    django_below((5, 0)), reason="requires Django 5.0 or later"
+)
+
+
+@pytest.fixture(scope="module")
+def django_app(tmp_path_factory):
+    """Generated Django files, installed as the "launchpad" app of a bare project."""
+    pytest.importorskip("rest_framework")
+    import django
+    from django.conf import settings
+    from django.db import connection
+
+    class Engine(DjangoORM):
+        name: str = Field(max_length=32)
+
+        class Config:
+            page_size = 2
+            ordering = "-name"
+
+    class Pad(DjangoORM):
+        site: str = Field(max_length=32)
+
+    class Rocket(DjangoORM):
+        name: str = Field(max_length=32)
+        engine: str = Field(foreign_key="Engine")
+        pad: str = Field(one_key="Pad")
+        spares: str = Field(many_key="Engine")
+
+        class Config:
+            indexes = [
+                Index(["name", "engine"]),
+                Index(["pad"], unique=True, where={"name": "Starship"}),
+            ]
+            batch_size = 50
+
+    tmp_path = tmp_path_factory.mktemp("project")
+    cwd = os.getcwd()
+    os.chdir(tmp_path)
+    try:
+        generate(
+            reactants=[Engine, Pad, Rocket],
+            class_based=True,
+            function_based=True,
+            async_based=True,
+            serialization="values",
+            cache=False,
+            workers=1,
+        )
+    finally:
+        os.chdir(cwd)
+    app = tmp_path / "reactant_products/django"
+    (app / "__init__.py").touch()
+    app.rename(tmp_path / "launchpad")
+    sys.path.insert(0, str(tmp_path))
+
+    settings.configure(
+        INSTALLED_APPS=["rest_framework", "launchpad"],
+        ALLOWED_HOSTS=["testserver"],
+        ROOT_URLCONF="launchpad.urls_async",
+        DATABASES={
+            "default": {"ENGINE": "django.db.backends.sqlite3", "NAME": ":memory:"}
+        },
+        REST_FRAMEWORK={
+            "DEFAULT_AUTHENTICATION_CLASSES": [],
+            "DEFAULT_PERMISSION_CLASSES": [],
+            "UNAUTHENTICATED_USER": None,
+        },
+    )
+    django.setup()
+    from launchpad import models
+
+    with connection.schema_editor() as editor:
+        for model in (models.Engine, models.Pad, models.Rocket):
+            editor.create_model(model)
+    yield models
+    sys.path.remove(str(tmp_path))
+
+
 class TestDjango:
     def test_django_combustion_chamber_get_models_method_return_djangomodels(self):
         class RocketEngine(DjangoORM):
@@ -31,7 +165,18 @@ class TestDjango:
         assert isinstance(models, list)
         assert isinstance(models[0], DjangoModel)
 
-    def test_generate_django_files_success(self):
+    def test_relation_fields_do_not_rename_shared_field_types(self):
+        class LaunchVehicle(DjangoORM):
+            engine: str = Field(foreign_key="RocketEngine")
+            name: str
+
+        model = DjangoCombustor.generate_django_orm_model(LaunchVehicle)
+
+        assert [field.type for field in model.fields] == ["ForeignKey", "CharField"]
+
+    def test_generate_django_files_success(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+
         class RocketEngine(DjangoORM):
             id: int = Field(primary_key=True, title="rocket_id")
             name: str = Field(max_length=32)
@@ -52,6 +197,8 @@ class TestDjango:
         dj_urls_class = Path(f"{p}/urls_class.py")
         dj_urls_func = Path(f"{p}/urls_func.py")
         dj_urls_viewset = Path(f"{p}/urls_viewset.py")
+        dj_pagination = Path(f"{p}/pagination.py")
+        manifest = Path("reactant_products/.reactant-manifest.json")
 
         assert dj_models.is_file()
         assert dj_views_class.is_file()
@@ -61,15 +208,540 @@ class TestDjango:
         assert dj_urls_class.is_file()
         assert dj_urls_func.is_file()
         assert dj_urls_viewset.is_file()
+        assert dj_pagination.is_file()
+        assert manifest.is_file()
+
+    @pytest.mark.parametrize(
+        "module, view",
+        [
+            ("views_class", "RocketList"),
+            ("views_func", "rocket_list"),
+            ("views_modelviewset", "RocketViewset"),
+        ],
+    )
+    def test_generated_views_list_in_constant_queries(self, django_app, module, view):
+        from importlib import import_module
+
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from rest_framework.test import APIRequestFactory
+
+        views = import_module(f"launchpad.{module}")
+        handler = getattr(views, view)
+        if module == "views_modelviewset":
+            handler = handler.as_view({"get": "list"})
+        elif module == "views_class":
+            handler = handler.as_view()
+        models = django_app
+
+        def count_queries():
+            request = APIRequestFactory().get("/")
+            with CaptureQueriesContext(connection) as queries:
+                response = handler(request)
+                response.render()
+            assert response.status_code == 200
+            return len(response.data["results"]), len(queries)
+
+        def launch(count):
+            for _ in range(count):
+                engine = models.Engine.objects.create(name="Merlin")
+                pad = models.Pad.objects.create(site="LC-39A")
+                rocket = models.Rocket.objects.create(
+                    name="Falcon", engine=engine, pad=pad
+                )
+                rocket.spares.add(engine)
+
+        launch(2)
+        rows, few = count_queries()
+        launch(20)
+        more_rows, many = count_queries()
+
+        assert more_rows == rows + 20
+        assert many == few
+
+    def test_generated_pagination_follows_reactant_config(self, django_app):
+        from launchpad.views_modelviewset import EngineViewset
+        from rest_framework.test import APIRequestFactory
+
+        for name in ["Raptor", "Merlin", "Kestrel"]:
+            django_app.Engine.objects.create(name=name)
+        engines = django_app.Engine.objects.order_by("-name")
+        handler = EngineViewset.as_view({"get": "list"})
+
+        url, names = "/", []
+        while url:
+            response = handler(APIRequestFactory().get(url))
+            assert len(response.data["results"]) <= 2
+            names.extend(engine["name"] for engine in response.data["results"])
+            url = response.data["next"]
+
+        assert names == [engine.name for engine in engines]
+
+    def test_generated_async_urls_route_to_async_views(self, django_app):
+        from asgiref.sync import iscoroutinefunction
+        from django.urls import resolve
+        from launchpad import views_async
+
+        for url, view in [
+            ("/engines", views_async.engine_list),
+            ("/engines/1", views_async.engine_detail),
+            ("/rockets/bulk", views_async.rocket_bulk),
+        ]:
+            match = resolve(url)
+            assert match.func is view
+            assert iscoroutinefunction(match.func)
+
+    @requires_django_5
+    def test_generated_async_views_serve_requests(self, django_app):
+        from asgiref.sync import async_to_sync
+        from django.test import AsyncClient
+
+        async def launch():
+            client = AsyncClient()
+
+            async def send(method, url, *data):
+                body = [json.dumps(value) for value in data]
+                response = await getattr(client, method)(
+                    url, *body, content_type="application/json"
+                )
+                return response.status_code, response.content and response.json()
+
+            # The id is read-only.
+            status, engine = await send("post", "/engines", {"id": 0, "name": "Vinci"})
+            engine_pk = (await django_app.Engine.objects.alatest("pk")).pk
+            assert (status, engine) == (201, {"id": engine_pk, "name": "Vinci"})
+            pad = await django_app.Pad.objects.acreate(site="ELA-4")
+            rocket = {
+                "name": "Ariane",
+                "engine": engine_pk,
+                "pad": pad.pk,
+                "spares": [engine_pk],
+            }
+            status, created = await send("post", "/rockets", rocket)
+            assert (status, created) == (201, {"id": created["id"], **rocket})
+            created = await django_app.Rocket.objects.aget(pk=created["id"])
+
+            url = f"/rockets/{created.pk}"
+            status, updated = await send("put", url, {**rocket, "name": "Ariane 6"})
+            assert (status, updated["name"]) == (200, "Ariane 6")
+            assert (await send("get", url))[1] == updated
+            _, page = await send("get", "/rockets")
+            assert updated in page["results"]
+
+            assert (await send("post", "/rockets", {"name": "Vega"}))[0] == 400
+            assert (
+                await client.post("/rockets", "{", "application/json")
+            ).status_code == 400
+            assert (await send("patch", url))[0] == 405
+            assert (await send("delete", url))[0] == 204
+            assert (await send("get", url))[0] == 404
+
+            pads = [await django_app.Pad.objects.acreate(site="ELA-4") for _ in "ab"]
+            vegas = [{**rocket, "name": "Vega", "pad": pad.pk} for pad in pads]
+            created = await send("post", "/rockets/bulk", vegas)
+            assert created == (201, {"created": 2})
+            assert (await send("delete", "/rockets/bulk?name=Vega")) == (
+                200,
+                {"deleted": 2},
+            )
+            assert (await send("delete", "/rockets/bulk"))[0] == 400
+
+        async_to_sync(launch)()
+
+    @requires_django_5
+    def test_generated_async_views_check_permissions_and_throttles(
+        self, django_app, monkeypatch
+    ):
+        import launchpad.views_async
+        from asgiref.sync import async_to_sync
+        from django.core.cache import cache
+        from django.test import AsyncClient
+        from rest_framework.permissions import IsAuthenticatedOrReadOnly
+        from rest_framework.throttling import AnonRateThrottle
+        from rest_framework.views import APIView
+
+        class Throttle(AnonRateThrottle):
+            rate = "1/min"
+
+        # Like DRF's views, the checks follow the policies of APIView.
+        class GuardedView(APIView):
+            permission_classes = [IsAuthenticatedOrReadOnly]
+            throttle_classes = [Throttle]
+
+        monkeypatch.setattr(launchpad.views_async, "APIView", GuardedView)
+
+        async def launch():
+            client = AsyncClient()
+            engine = json.dumps({"name": "Vulcain"})
+            assert (await client.get("/engines")).status_code == 200
+            for url in ("/engines", "/engines/bulk"):
+                response = await client.post(url, engine, "application/json")
+                assert response.status_code == 403
+                assert response.json() == {
+                    "detail": "You do not have permission to perform this action."
+                }
+            response = await client.delete("/engines/1")
+            assert response.status_code == 403
+
+            assert (await client.get("/engines")).status_code == 429
+
+        cache.clear()
+        try:
+            async_to_sync(launch)()
+        finally:
+            cache.clear()
+        assert not django_app.Engine.objects.filter(name="Vulcain").exists()
+
+    @pytest.mark.parametrize(
+        "module, view",
+        [
+            ("views_class", "RocketBulk"),
+            ("views_func", "rocket_bulk"),
+            ("views_modelviewset", "RocketViewset"),
+        ],
+    )
+    def test_generated_bulk_endpoints_save_in_batches(self, django_app, module, view):
+        from importlib import import_module
+
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from rest_framework.test import APIRequestFactory
+
+        views = import_module(f"launchpad.{module}")
+        handler = getattr(views, view)
+        if module == "views_modelviewset":
+            handler = handler.as_view({"post": "bulk", "put": "bulk", "delete": "bulk"})
+        elif module == "views_class":
+            handler = handler.as_view()
+        models = django_app
+
+        def send(method, data=None, query=""):
+            request = getattr(APIRequestFactory(), method)(
+                f"/{query}", data, format="json"
+            )
+            with CaptureQueriesContext(connection) as queries:
+                response = handler(request)
+            return response.status_code, response.data, len(queries)
+
+        engine = models.Engine.objects.create(name="RS-25")
+        pads = models.Pad.objects.bulk_create(
+            models.Pad(site="LC-39B") for _ in range(200)
+        )
+        rockets = [
+            {"name": module, "engine": engine.pk, "pad": pad.pk, "spares": [engine.pk]}
+            for pad in pads
+        ]
+        # Related rows are loaded once per field, then rows and links are saved 50
+        # at a time (the reactant's batch_size), within a savepoint.
+        batches = 200 // 50
+        status, data, queries = send("post", rockets)
+        assert (status, data) == (201, {"created": 200})
+        assert queries <= 3 + batches * 2 + 2
+        saved = models.Rocket.objects.filter(name=module)
+        assert saved.count() == 200
+        assert all(len(rocket.spares.all()) == 1 for rocket in saved)
+
+        spare = models.Engine.objects.create(name="RL10")
+        updates = [
+            {**rocket, "name": f"{module} 1B", "spares": [spare.pk]}
+            for rocket in rockets
+        ]
+        for update, rocket in zip(updates, saved.order_by("pad")):
+            update["id"] = rocket.pk
+        status, data, queries = send("put", updates)
+        assert (status, data) == (200, {"updated": 200})
+        # The rows are loaded too, and their former links deleted.
+        assert queries <= 1 + 3 + batches * 2 + 1 + 2
+        assert models.Rocket.objects.filter(name=f"{module} 1B").count() == 200
+        updated = models.Rocket.objects.filter(name=f"{module} 1B")
+        assert {rocket.spares.get() for rocket in updated} == {spare}
+
+        assert send("post", rockets[:2])[0] == 400
+        assert send("put", [{**updates[0], "id": 0}])[0] == 400
+        assert send("delete")[0] == 400
+        assert send("delete", query="?launch=1")[0] == 400
+        status, data, _ = send("delete", query=f"?name={module} 1B&name={module}")
+        assert (status, data) == (200, {"deleted": 200})
+
+    @requires_django_5
+    def test_values_serialization_matches_model_serializers(self, django_app):
+        import launchpad
+        from launchpad.views_class import RocketList
+
+        from benchmarks.serialization import serializer
+
+        models = django_app
+        engines = models.Engine.objects.bulk_create(
+            models.Engine(name=f"Merlin {number}") for number in range(10)
+        )
+        try:
+            pads = models.Pad.objects.bulk_create(
+                models.Pad(site="SLC-40") for _ in range(10000)
+            )
+            rockets = models.Rocket.objects.bulk_create(
+                models.Rocket(name="Benchmark", engine=engines[number % 10], pad=pad)
+                for number, pad in enumerate(pads)
+            )
+            through = models.Rocket.spares.through
+            through.objects.bulk_create(
+                through(rocket=rocket, engine=engines[number % 7])
+                for number, rocket in enumerate(rockets)
+            )
+            queryset = RocketList.queryset.filter(name="Benchmark")
+
+            model, values = (
+                json.loads(serializer(mode, launchpad, "Rocket")(queryset.all()))
+                for mode in ("model", "values")
+            )
+            assert len(values) == 10000
+            assert values == model
+            assert {row["id"] for row in values} == {rocket.pk for rocket in rockets}
+        finally:
+            models.Rocket.objects.filter(name="Benchmark").delete()
+            models.Pad.objects.filter(site="SLC-40").delete()
+            models.Engine.objects.filter(
+                pk__in=[engine.pk for engine in engines]
+            ).delete()
+
+    def test_generated_models_declare_indexes(self, django_app):
+        from django.db import connection
+
+        with connection.cursor() as cursor:
+            constraints = connection.introspection.get_constraints(
+                cursor, django_app.Rocket._meta.db_table
+            )
+
+        assert constraints["rocket_name_engine_idx"]["columns"] == ["name", "engine_id"]
+        assert constraints["rocket_pad_uniq"]["unique"]
+
+    def test_page_number_pagination_and_invalid_config(self):
+        class Launch(DjangoORM):
+            site: str
+
+            class Config:
+                page_size = 25
+
+        chamber = DjangoCombustionChamber([Launch])
+        products = chamber.render_manager(pagination="page_number")
+        files = {p.item_name: "".join(p.chunks) for p in products}
+
+        assert (
+            "class LaunchPagination(OrderedPageNumberPagination):"
+            in files["pagination"]
+        )
+        assert "page_size = 25" in files["pagination"]
+        assert "pagination_class = LaunchPagination" in files["views_modelviewset"]
+
+        class Landing(DjangoORM):
+            site: str
 
-        dj_models.unlink()
-        dj_views_class.unlink()
-        dj_views_func.unlink()
-        dj_views_viewset.unlink()
-        dj_serializers.unlink()
-        dj_urls_class.unlink()
-        dj_urls_func.unlink()
-        dj_urls_viewset.unlink()
+            class Config:
+                ordering = "-pad"
+
+        with pytest.raises(InvalidPagination):
+            DjangoCombustionChamber([Landing]).render_manager()
+
+        class Booster(DjangoORM):
+            site: str
+
+            class Config:
+                batch_size = 0
+
+        with pytest.raises(InvalidBatchSize):
+            DjangoCombustionChamber([Booster]).render_manager()
+
+
+class TestTypeRegistry:
+    def test_registry_resolves_types_through_mro(self):
+        class Version(str):
+            pass
+
+        registry = TypeRegistry({str: "CharField", bool: "BooleanField", int: "Int"})
+
+        assert registry.resolve(Version) == "CharField"
+        assert registry.resolve(bool) == "BooleanField"
+        assert registry.resolve(complex) is None
+
+    def test_registry_accepts_custom_types(self, monkeypatch):
+        # Types are registered on a copy, so that they do not leak into other tests.
+        registry = copy.deepcopy(DjangoCombustor.type_registry)
+        monkeypatch.setattr(DjangoCombustor, "type_registry", registry)
+
+        class Money:
+            pass
+
+        class Invoice(DjangoORM):
+            total: Money
+
+            class Config:
+                arbitrary_types_allowed = True
+
+        with pytest.raises(UnsupportedFieldType):
+            DjangoCombustor.generate_django_orm_model(Invoice)
+
+        DjangoCombustor.type_registry.register(Money, "DecimalField")
+        model = DjangoCombustor.generate_django_orm_model(Invoice)
+
+        assert model.fields[0].type == "DecimalField"
+
+
+class TestIR:
+    def test_reactants_are_introspected_once(self):
+        class LaunchPad(DjangoORM):
+            site: str = Field(max_length=32, help_text="site")
+            vehicle: Optional[str] = Field(foreign_key="LaunchVehicle")
+
+        model = describe_model(LaunchPad)
+
+        assert describe_model(LaunchPad) is model
+        assert (model.snake_name, model.plural_name) == ("launch_pad", "launch_pads")
+        site, vehicle = model.fields
+        assert site.options == (("help_text", "site"),)
+        assert (vehicle.relation_kind, vehicle.relation) == ("foreign", "LaunchVehicle")
+        assert vehicle.nullable and not vehicle.has_default
+
+    def test_sqla_foreign_key_with_options_renders_valid_code(self):
+        class LaunchPad(SQLAlchemyORM):
+            vehicle: Optional[str] = Field(foreign_key="LaunchVehicle", index=True)
+
+        chamber = SQLAlchemyCombustionChamber([LaunchPad])
+        for product in chamber.render_manager():
+            code = "".join(product.chunks)
+            compile(code, product.item_name, "exec")
+            if product.item_name.endswith("models"):
+                assert (
+                    'ForeignKey("launch_vehicle.id"), nullable=True, index=True' in code
+                )
+
+
+class TestIndexes:
+    def test_indexes_are_named_and_checked_against_fields(self):
+        class LaunchWindowOfAnExceptionallyLongName(DjangoORM):
+            site: str
+            opens: int
+
+            class Config:
+                indexes = [Index(["site", "opens"]), Index(["site"], name="by_site")]
+
+        model = describe_model(LaunchWindowOfAnExceptionallyLongName)
+
+        assert [len(index.name) for index in model.indexes] == [30, 7]
+        assert model.indexes[0].fields == ("site", "opens")
+
+        class Landing(DjangoORM):
+            site: str
+
+            class Config:
+                indexes = [Index(["site"], where={"pad": None})]
+
+        with pytest.raises(InvalidIndex, match="no field is named pad"):
+            describe_model(Landing)
+
+    def test_sqla_and_peewee_models_create_indexes(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+
+        def indexed(base):
+            class Site(base):
+                name: str
+
+            class Launch(base):
+                site: str = Field(foreign_key="Site")
+                status: str
+                scrubbed: bool = False
+
+                class Config:
+                    indexes = [
+                        Index(["status", "site"]),
+                        Index(["status"], unique=True, where={"scrubbed": False}),
+                    ]
+
+            return [Site, Launch]
+
+        reactants = indexed(SQLAlchemyORM) + indexed(PeeweeORM)
+        generate(workers=1, cache=False, reactants=reactants)
+
+        import peewee
+        import sqlalchemy
+
+        p = tmp_path / "reactant_products"
+        monkeypatch.syspath_prepend(str(p / "sqla"))
+        import classical_models
+        import declarative_models
+
+        # Peewee models import their database, so they are imported as a package.
+        shutil.copytree(p / "peewee", tmp_path / "launches")
+        (tmp_path / "launches/__init__.py").touch()
+        monkeypatch.syspath_prepend(str(tmp_path))
+        from launches import models
+
+        expected = {"launch_status_site_idx", "launch_status_uniq"}
+        for metadata in [
+            declarative_models.Base.metadata,
+            classical_models.mapper_registry.metadata,
+        ]:
+            engine = sqlalchemy.create_engine("sqlite://")
+            metadata.create_all(engine)
+            indexes = sqlalchemy.inspect(engine).get_indexes("launch")
+            # Foreign keys are indexed too.
+            assert {index["name"] for index in indexes} == {
+                *expected,
+                "ix_launch_site_id",
+            }
+
+        database = peewee.SqliteDatabase(":memory:")
+        database.bind([models.Site, models.Launch])
+        database.create_tables([models.Site, models.Launch])
+        assert expected <= {index.name for index in database.get_indexes("launch")}
+        for name in ["classical_models", "declarative_models"]:
+            del sys.modules[name]
+        for name in [name for name in sys.modules if name.split(".")[0] == "launches"]:
+            del sys.modules[name]
+
+
+class TestEmitter:
+    chambers = {
+        "django": DjangoCombustionChamber,
+        "peewee": PeeweeCombustionChamber,
+        "sqla": SQLAlchemyCombustionChamber,
+    }
+
+    @pytest.mark.parametrize("target", ["django", "peewee", "sqla"])
+    def test_native_engine_matches_black_formatted_templates(self, target):
+        from benchmarks.generation import BASES, make_reactants
+
+        class LaunchVehicleWithAnUnusuallyLongNameForWrapping(BASES[target]):
+            name: str = Field(max_length=32, help_text="x" * 60, title="vehicle_name")
+            ratio: float = Field(1.5, help_text="<ratio>", index=True)
+            quoted: str = Field('say "hi"', title="quoted")
+            engine: Optional[str] = Field(
+                foreign_key="RocketEngine", related_name="vehicles", index=True
+            )
+
+        class Launch(BASES[target]):
+            site: str = Field(max_length=32)
+            scrubbed: bool = False
+
+            class Config:
+                indexes = [
+                    Index(["site"]),
+                    Index(["site", "scrubbed"], unique=True, where={"scrubbed": False}),
+                ]
+
+        reactants = make_reactants(target, 10, 12)
+        reactants.extend([Launch, LaunchVehicleWithAnUnusuallyLongNameForWrapping])
+        chamber = self.chambers[target](reactants)
+
+        jinja = chamber.render_manager()
+        native = chamber.render_manager(engine="native")
+
+        native = [p._replace(chunks=list(p.chunks)) for p in native]
+        for product in native:
+            if product.item_name.endswith("models"):
+                *emitted, quoted = product.chunks[1:]
+                assert all(isinstance(chunk, FormattedCode) for chunk in emitted)
+                # The chunk with a quoted default is left to black.
+                assert not isinstance(quoted, FormattedCode)
+        assert format_products(native, workers=1) == format_products(jinja, workers=1)
 
 
 class TestPeewee:
@@ -89,7 +761,9 @@ class TestPeewee:
         assert isinstance(models, list)
         assert isinstance(models[0], PeeweeModel)
 
-    def test_generate_peewee_files_success(self):
+    def test_generate_peewee_files_success(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+
         class RocketEngine(PeeweeORM):
             id: int = Field(primary_key=True, title="rocket_id")
             name: str = Field(max_length=32)
@@ -103,10 +777,74 @@ class TestPeewee:
 
         p = "reactant_products/peewee"
         models = Path(f"{p}/models.py")
+        database = Path(f"{p}/database.py")
+        manifest = Path("reactant_products/.reactant-manifest.json")
 
         assert models.is_file()
+        assert database.is_file()
+        assert manifest.is_file()
+
+    def test_generated_models_share_a_pooled_database(self, tmp_path, monkeypatch):
+        import threading
+
+        from playhouse.pool import MaxConnectionsExceeded
+
+        monkeypatch.chdir(tmp_path)
 
-        models.unlink()
+        class Launch(PeeweeORM):
+            site: str
+
+        generate(workers=1, cache=False, reactants=[Launch])
+        (tmp_path / "reactant_products/peewee/__init__.py").touch()
+        (tmp_path / "reactant_products/peewee").rename(tmp_path / "launches")
+        monkeypatch.syspath_prepend(str(tmp_path))
+        from launches import database, models
+
+        assert models.BaseModel._meta.database is database.db
+        pool = database.pooled_sqlite(str(tmp_path / "launches.db"))
+        database.initialize(pool)
+        with database.connection_context():
+            database.db.create_tables([models.Launch])
+
+        # Requests in turn, on any thread, reuse the connection of the pool.
+        connections = []
+
+        def request():
+            database.open_connection()
+            models.Launch.create(site="LC-39A")
+            connections.append(database.db.connection())
+            database.close_connection()
+
+        for _ in range(3):
+            thread = threading.Thread(target=request)
+            thread.start()
+            thread.join()
+        assert len(set(map(id, connections))) == 1
+        assert database.db.is_closed()
+        with database.connection_context():
+            assert models.Launch.select().count() == 3
+
+        # A request waits for a free connection, at most `timeout` seconds.
+        database.initialize(
+            database.pooled_sqlite(pool.database, max_connections=1, timeout=0.1)
+        )
+        errors = []
+
+        def wait():
+            try:
+                database.open_connection()
+            except MaxConnectionsExceeded as error:
+                errors.append(error)
+
+        with database.connection_context():
+            thread = threading.Thread(target=wait)
+            thread.start()
+            thread.join()
+        assert len(errors) == 1
+        for database_pool in [pool, database.db.obj]:
+            database_pool.close_all()
+        for name in [name for name in sys.modules if name.split(".")[0] == "launches"]:
+            del sys.modules[name]
 
 
 class TestSQLAlchemy:
@@ -126,7 +864,9 @@ class TestSQLAlchemy:
         assert isinstance(models, list)
         assert isinstance(models[0], SQLAlchemyModel)
 
-    def test_generate_sqla_files_success(self):
+    def test_generate_sqla_files_success(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+
         class RocketEngine(SQLAlchemyORM):
             id: int = Field(primary_key=True, title="rocket_id")
             name: str = Field(max_length=32)
@@ -141,9 +881,703 @@ class TestSQLAlchemy:
         p = "reactant_products/sqla"
         declarative_models = Path(f"{p}/declarative_models.py")
         classical_models = Path(f"{p}/classical_models.py")
+        database = Path(f"{p}/database.py")
+        manifest = Path("reactant_products/.reactant-manifest.json")
 
         assert declarative_models.is_file()
         assert classical_models.is_file()
+        assert database.is_file()
+        assert manifest.is_file()
+
+    def test_relationships_load_both_sides_in_constant_queries(
+        self, tmp_path, monkeypatch
+    ):
+        monkeypatch.chdir(tmp_path)
+
+        class Pad(SQLAlchemyORM):
+            site: str
+
+        class Stage(SQLAlchemyORM):
+            name: str
+            upper: Optional[str] = Field(None, foreign_key="Stage")
+
+        class Mission(SQLAlchemyORM):
+            pad: str = Field(foreign_key="Pad")
+            backup_pad: Optional[str] = Field(None, foreign_key="Pad", lazy="raise")
+            stage: str = Field(foreign_key="Stage", related_name="missions")
+
+        generate(workers=1, cache=False, reactants=[Pad, Stage, Mission])
+
+        import sqlalchemy
+        from sqlalchemy.orm import Session
+
+        monkeypatch.syspath_prepend(str(tmp_path / "reactant_products/sqla"))
+        import classical_models
+        import declarative_models
+
+        for module, metadata in [
+            (declarative_models, declarative_models.Base.metadata),
+            (classical_models, classical_models.mapper_registry.metadata),
+        ]:
+            engine = sqlalchemy.create_engine("sqlite://")
+            metadata.create_all(engine)
+            queries = []
+            sqlalchemy.event.listen(
+                engine, "before_cursor_execute", lambda *args: queries.append(1)
+            )
+            with Session(engine) as session:
+                stage = module.Stage(name="first", upper=module.Stage(name="second"))
+                session.add(stage)
+                session.commit()
+                stage_id = stage.id
+
+            counts = []
+            for count in [2, 20]:
+                with Session(engine) as session:
+                    pads = [module.Pad(site="LC-39A") for _ in range(count)]
+                    session.add_all(pads)
+                    session.flush()
+                    session.add_all(
+                        module.Mission(pad_id=pad.id, stage_id=stage_id) for pad in pads
+                    )
+                    session.commit()
+
+                with Session(engine) as session:
+                    queries.clear()
+                    pads = session.scalars(sqlalchemy.select(module.Pad)).all()
+                    missions = [m for pad in pads for m in pad.missions_by_pad]
+                    assert {m.stage.upper.name for m in missions} == {"second"}
+                    assert {m.pad.site for m in missions} == {"LC-39A"}
+                    counts.append(len(queries))
+                    assert missions[0] in missions[0].stage.missions
+                    assert missions[0].stage in missions[0].stage.upper.stages
+                    with pytest.raises(sqlalchemy.exc.InvalidRequestError):
+                        missions[0].backup_pad
+            assert counts[0] == counts[1]
+        for name in ["classical_models", "declarative_models"]:
+            del sys.modules[name]
+
+    def test_generated_database_module_configures_engines_and_sessions(
+        self, tmp_path, monkeypatch
+    ):
+        monkeypatch.chdir(tmp_path)
+
+        class Pad(SQLAlchemyORM):
+            site: str
+
+        generate(workers=1, cache=False, reactants=[Pad])
+        (tmp_path / "reactant_products/sqla/__init__.py").touch()
+        (tmp_path / "reactant_products/sqla").rename(tmp_path / "pads")
+        monkeypatch.syspath_prepend(str(tmp_path))
+        monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path / 'pads.db'}")
+        import sqlalchemy
+        from pads import classical_models, database, declarative_models
+
+        assert database.engine.url.database == str(tmp_path / "pads.db")
+        assert database.engine.pool._pre_ping
+        options = database.pool_options("postgresql://db.mysite.com/pads", {})
+        assert options == database.POOL_OPTIONS
+        assert (
+            database.pool_options("postgresql://", {"pool_size": 1})["pool_size"] == 1
+        )
+
+        database.create_all()
+        database.create_all(metadata=classical_models.mapper_registry.metadata)
+        assert sqlalchemy.inspect(database.engine).get_table_names() == ["pad"]
+
+        # Objects are still loaded once committed.
+        queries = []
+        sqlalchemy.event.listen(
+            database.engine, "before_cursor_execute", lambda *args: queries.append(1)
+        )
+        with database.SessionLocal() as session:
+            pad = declarative_models.Pad(site="LC-39A")
+            session.add(pad)
+            session.commit()
+            count = len(queries)
+            assert (pad.id, pad.site) == (1, "LC-39A")
+            assert len(queries) == count
+
+        for name in [name for name in sys.modules if name.split(".")[0] == "pads"]:
+            del sys.modules[name]
+
+    def test_generated_database_module_makes_async_sessions(
+        self, tmp_path, monkeypatch
+    ):
+        pytest.importorskip("aiosqlite")
+        from asgiref.sync import async_to_sync
+
+        monkeypatch.chdir(tmp_path)
+
+        class Pad(SQLAlchemyORM):
+            site: str
+
+        generate(workers=1, cache=False, reactants=[Pad])
+        (tmp_path / "reactant_products/sqla/__init__.py").touch()
+        (tmp_path / "reactant_products/sqla").rename(tmp_path / "pads")
+        monkeypatch.syspath_prepend(str(tmp_path))
+        from pads import database, declarative_models
+
+        async def launch():
+            async_engine = database.make_async_engine(
+                f"sqlite+aiosqlite:///{tmp_path / 'pads.db'}"
+            )
+            await database.create_all_async(async_engine)
+            sessions = database.make_async_sessionmaker(async_engine)
+            async with sessions() as session:
+                pad = declarative_models.Pad(site="LC-39A")
+                session.add(pad)
+                await session.commit()
+            await async_engine.dispose()
+            # Objects are not expired on commit, so they are read without awaiting.
+            return pad.site
+
+        assert async_to_sync(launch)() == "LC-39A"
+        for name in [name for name in sys.modules if name.split(".")[0] == "pads"]:
+            del sys.modules[name]
+
+
+class TestProducts:
+    def test_format_products_in_pool_keeps_order(self):
+        products = [
+            Product(
+                "Test", "reactant_products/test", f"item_{i}", [f"x{i}=[ {i},{i} ]"]
+            )
+            for i in range(4)
+        ]
+
+        serial = format_products(products, workers=1)
+        pooled = format_products(products, workers=2)
+
+        assert pooled == serial
+        assert serial[3] == "x3 = [3, 3]\n"
+
+    def test_format_products_reuses_cached_chunks(self, tmp_path, monkeypatch):
+        cache = ChunkCache(tmp_path)
+        products = [Product("Test", "reactant_products/test", "models", ["a=1", "b=2"])]
+        first = format_products(products, workers=1, cache=cache)
+
+        def format_code(code):
+            assert code == "c=3"
+            return "c = 3\n"
+
+        monkeypatch.setattr("reactant.products.format_code", format_code)
+        products = [Product("Test", "reactant_products/test", "models", ["a=1", "c=3"])]
+        second = format_products(products, workers=1, cache=cache)
+
+        assert first == ["a = 1\n\n\nb = 2\n"]
+        assert second == ["a = 1\n\n\nc = 3\n"]
+
+    def test_chunk_cache_prunes_unused_chunks(self, tmp_path):
+        cache = ChunkCache(tmp_path)
+        used, unused = cache.key("a=1"), cache.key("b=2")
+        cache.put(used, "a = 1\n")
+        cache.put(unused, "b = 2\n")
+        month_ago = time.time() - 31 * 24 * 3600
+        for key in (used, unused):
+            os.utime(tmp_path / key[:2] / key[2:], (month_ago, month_ago))
+
+        assert cache.get(used) == "a = 1\n"
+        cache.prune()
+
+        assert cache.get(used) == "a = 1\n"
+        assert cache.get(unused) is None
+        # Caches are pruned at most once a day.
+        os.utime(tmp_path / used[:2] / used[2:], (month_ago, month_ago))
+        cache.prune()
+        assert cache.get(used) == "a = 1\n"
+
+    def test_write_products_skips_unchanged_files(self, tmp_path):
+        directory = tmp_path / "django"
+        products = [
+            Product("Test", str(directory), "models", []),
+            Product("Test", str(directory), "views", []),
+        ]
+        write_products(products, [["a = 1\n"], ["b = 2\n"]])
+        os.utime(directory / "models.py", ns=(0, 0))
+
+        write_products(products, [["a = 1\n"], ["b = ", "3\n"]])
+
+        assert (directory / "models.py").stat().st_mtime_ns == 0
+        assert (directory / "views.py").read_text() == "b = 3\n"
+        assert sorted(os.listdir(directory)) == ["models.py", "views.py"]
+
+    def test_write_products_leaves_no_partial_directory(self, tmp_path):
+        directory = tmp_path / "django"
+        products = [
+            Product("Test", str(directory), "models", []),
+            Product("Test", str(directory), "views", []),
+        ]
+
+        def failing_render():
+            yield "b = "
+            raise RenderFailed("views")
+
+        with pytest.raises(RenderFailed):
+            write_products(products, [["a = 1\n"], failing_render()])
+
+        assert os.listdir(tmp_path) == []
+
+    def test_streamed_products_match_formatting_whole_files(self, tmp_path):
+        class RocketEngine(SQLAlchemyORM):
+            name: str = Field(max_length=32, title="engine_name")
+            power_cycle: Optional[str] = "gas-generator"
+
+        class LaunchVehicle(SQLAlchemyORM):
+            name: str = Field(max_length=32)
+            rocket_engine: str = Field(foreign_key="RocketEngine")
+
+        combust = SQLAlchemyCombustionChamber([RocketEngine, LaunchVehicle])
+        whole = format_products(combust.render_manager(), workers=1)
+        streamed = [
+            "".join(format_chunks(product.chunks))
+            for product in combust.render_manager(stream=True)
+        ]
+
+        assert streamed == whole
+
+    @pytest.mark.parametrize("shard_size", [None, 1])
+    @pytest.mark.parametrize(
+        "base, chamber, options",
+        [
+            (DjangoORM, DjangoCombustionChamber, {"async_based": True}),
+            (PeeweeORM, PeeweeCombustionChamber, {}),
+            (SQLAlchemyORM, SQLAlchemyCombustionChamber, {}),
+        ],
+    )
+    def test_streaming_keeps_no_model_described(
+        self, base, chamber, options, shard_size
+    ):
+        from reactant.orm import ir
+
+        class Launcher(base):
+            name: str = Field(max_length=32)
+
+        class Capsule(base):
+            launcher: str = Field(foreign_key="Launcher")
+
+        combust = chamber([Launcher, Capsule])
+        products = combust.render_manager(stream=True, shard_size=shard_size, **options)
+        streamed = ["".join(format_chunks(product.chunks)) for product in products]
+
+        assert Launcher not in ir._models and Capsule not in ir._models
+        whole = chamber([Launcher, Capsule]).render_manager(
+            shard_size=shard_size, **options
+        )
+        assert streamed == format_products(whole, workers=1)
+
+    @pytest.mark.parametrize("stream", [False, True])
+    def test_render_errors_are_reported_as_render_errors(
+        self, tmp_path, monkeypatch, capsys, stream
+    ):
+        def render_views_class(self, names, serialization="model"):
+            return render_chunks("missing.txt.jinja", "views_class"), "views_class"
+
+        monkeypatch.chdir(tmp_path)
+        monkeypatch.setattr(
+            DjangoCombustionChamber, "render_views_class", render_views_class
+        )
+
+        class Launch(DjangoORM):
+            site: str
+
+        with pytest.raises(RenderFailed):
+            generate(reactants=[Launch], stream=stream, cache=False, workers=1)
+        output = capsys.readouterr().out
+
+        assert "Something went wrong rendering Django files." in output
+        assert "formatting" not in output
+
+
+class TestManifest:
+    def test_fingerprint_changes_with_field_info(self):
+        def make_reactant(max_length):
+            class RocketEngine(PeeweeORM):
+                name: str = Field(max_length=max_length)
+
+            return RocketEngine
+
+        short_name = fingerprint_reactants("peewee", [make_reactant(32)], {})
+        same_name = fingerprint_reactants("peewee", [make_reactant(32)], {})
+        long_name = fingerprint_reactants("peewee", [make_reactant(64)], {})
+
+        assert short_name == same_name
+        assert short_name != long_name
+
+    def test_generate_check_reports_stale_products(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+
+        class RocketEngine(SQLAlchemyORM):
+            name: str = Field(max_length=32)
+            thrust_weight_ratio: int
+
+        generate(reactants=[RocketEngine], workers=1, force=True)
+        generate(reactants=[RocketEngine], check=True)
+
+        (tmp_path / "reactant_products/sqla/classical_models.py").unlink()
+
+        with pytest.raises(StaleProducts) as stale:
+            generate(reactants=[RocketEngine], check=True)
+        assert stale.value.targets == ["sqla"]
+
+
+class TestProfiling:
+    def test_nested_phases_are_excluded(self):
+        profiler = Profiler()
+        with profiler.phase("sqla", "render", "models"):
+            with profiler.phase("sqla", "introspection"):
+                time.sleep(0.02)
+
+        timings = profiler.target("reactant_products/sqla")
+        assert timings["phases"]["introspection"] >= 0.02
+        assert timings["files"]["models.py"]["render"] < 0.02
+
+    def test_generate_writes_profile_report(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+
+        class RocketEngine(SQLAlchemyORM):
+            name: str = Field(max_length=32)
+            thrust_weight_ratio: int
+
+        generate(
+            reactants=[RocketEngine],
+            workers=1,
+            force=True,
+            stream=True,
+            profile=True,
+            cprofile=True,
+        )
+
+        report = tmp_path / "reactant-profile.json"
+        sqla = json.loads(report.read_text())["targets"]["sqla"]
+        assert (sqla["models"], sqla["fields"]) == (1, 2)
+        assert {"fingerprint", "introspection"} <= set(sqla["phases"])
+        for timings in sqla["files"].values():
+            assert set(timings) == {"render", "format", "write"}
+        assert report.with_suffix(".prof").is_file()
+
+
+class TestLoader:
+    def test_reload_changed_module_and_its_dependents(self, tmp_path):
+        package = tmp_path / "watched_schemas"
+        package.mkdir()
+        (package / "__init__.py").write_text("")
+        (package / "engines.py").write_text(
+            "from reactant import Field, PeeweeORM\n\n\n"
+            "class Engine(PeeweeORM):\n"
+            "    name: str = Field(max_length=32)\n"
+        )
+        (package / "turbos.py").write_text(
+            "from watched_schemas.engines import Engine\n\n\n"
+            "class Turbo(Engine):\n"
+            "    boost: int\n"
+        )
+
+        loader = ReactantLoader()
+        loader.load(package)
+        assert [r.__name__ for r in loader.reactants()] == ["Engine", "Turbo"]
+
+        engines = (package / "engines.py").resolve()
+        engines.write_text(engines.read_text().replace("32", "64"))
+        loader.reload([engines])
+
+        for reactant in loader.reactants():
+            assert reactant.__fields__["name"].field_info.max_length == 64
+        assert len(loader.reactants()) == 2
+
+    def test_scripts_defer_generate(self, tmp_path):
+        script = tmp_path / "generate_rockets.py"
+        script.write_text(
+            "from reactant import DjangoORM, generate\n\n\n"
+            "class Rocket(DjangoORM):\n"
+            "    stages: int\n\n\n"
+            'if __name__ == "__main__":\n'
+            "    generate(function_based=False)\n"
+        )
+
+        loader = ReactantLoader()
+        loader.load(script)
+
+        assert [r.__name__ for r in loader.reactants()] == ["Rocket"]
+        assert loader.generate_options()["function_based"] is False
+
+
+class TestWatcher:
+    def test_watch_regenerates_changed_files_and_recovers(
+        self, tmp_path, monkeypatch, capsys
+    ):
+        import reactant.watch
+        from reactant.watch import ReactantWatcher
+
+        monkeypatch.chdir(tmp_path)
+        schemas = tmp_path / "schemas"
+        schemas.mkdir()
+        engines = schemas / "engines.py"
+        boosters = schemas / "boosters.py"
+        models = tmp_path / "reactant_products/peewee/models.py"
+        stamp = [time.time_ns()]
+
+        def write(file, code):
+            # Every write gets a later mtime, however coarse the filesystem clock.
+            stamp[0] += 10**9
+            file.write_text(code)
+            os.utime(file, ns=(stamp[0], stamp[0]))
+
+        def engine(max_length):
+            return (
+                "from reactant import Field, PeeweeORM, generate\n\n\n"
+                "class Engine(PeeweeORM):\n"
+                f"    name: str = Field(max_length={max_length})\n\n\n"
+                'if __name__ == "__main__":\n'
+                "    generate(workers=1, cache=False)\n"
+            )
+
+        # Each step checks the products of the last change, then changes the files.
+        steps = [
+            lambda: write(engines, engine(64)),
+            lambda: write(engines, "class Engine(\n"),
+            lambda: write(engines, engine(16)),
+            lambda: write(
+                boosters,
+                "from reactant import PeeweeORM\n\n\n"
+                "class Booster(PeeweeORM):\n"
+                "    thrust: int\n",
+            ),
+            boosters.unlink,
+        ]
+        expected = [
+            "max_length=32",
+            "max_length=64",
+            "max_length=64",
+            "max_length=16",
+            "class Booster(",
+            "max_length=16",
+        ]
+
+        def sleep(seconds):
+            code = models.read_text()
+            assert expected.pop(0) in code
+            if not steps:
+                assert "class Booster(" not in code
+                raise KeyboardInterrupt
+            steps.pop(0)()
+
+        monkeypatch.setattr(
+            reactant.watch,
+            "time",
+            types.SimpleNamespace(sleep=sleep, perf_counter=time.perf_counter),
+        )
+        write(engines, engine(32))
+
+        with pytest.raises(KeyboardInterrupt):
+            ReactantWatcher(schemas, interval=0).watch()
+
+        assert expected == [] and steps == []
+        assert "Generation failed. Waiting for changes." in capsys.readouterr().out
+
+
+class TestRunner:
+    def test_run_generates_many_files_in_one_pass(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        for name in ("Booster", "Capsule"):
+            (tmp_path / f"{name.lower()}.py").write_text(
+                "from reactant import PeeweeORM, generate\n\n\n"
+                f"class {name}(PeeweeORM):\n"
+                "    mass: int\n\n\n"
+                'if __name__ == "__main__":\n'
+                "    generate(workers=1, cache=False)\n"
+            )
+
+        result = CliRunner().invoke(runner, ["*.py"])
+
+        assert result.exit_code == 0, result.output
+        assert result.output.count("Found 2 Peewee reactants.") == 1
+        models = (tmp_path / "reactant_products/peewee/models.py").read_text()
+        assert "class Booster(BaseModel)" in models
+        assert "class Capsule(BaseModel)" in models
+
+    def test_run_check_exits_with_status_1_when_stale(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        (tmp_path / "booster.py").write_text(
+            "from reactant import PeeweeORM\n\n\n"
+            "class Booster(PeeweeORM):\n"
+            "    mass: int\n"
+        )
+
+        stale = CliRunner().invoke(runner, ["booster.py", "--check"])
+        assert stale.exit_code == 1, stale.output
+        assert "Stale reactant products: peewee." in stale.output
+
+        assert CliRunner().invoke(runner, ["booster.py"]).exit_code == 0
+        fresh = CliRunner().invoke(runner, ["booster.py", "--check"])
+        assert fresh.exit_code == 0, fresh.output
+
+
+class TestConcurrency:
+    def test_failing_target_does_not_stop_others(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+
+        class Booster(PeeweeORM):
+            mass: int
+
+        class Capsule(SQLAlchemyORM):
+            crew: int
+
+        def fail(*args):
+            raise RenderFailed("models")
+
+        monkeypatch.setattr(reaction, "generate_peewee", fail)
+
+        with pytest.raises(GenerationFailed):
+            generate(
+                workers=1, cache=False, concurrent=True, reactants=[Booster, Capsule]
+            )
+
+        assert Path("reactant_products/sqla/declarative_models.py").is_file()
+        assert not Path("reactant_products/peewee").exists()
+        assert set(Manifest("reactant_products").targets) == {"sqla"}
+
+
+class TestSharding:
+    def test_sharded_packages_resolve_relations_across_shards(
+        self, tmp_path, monkeypatch
+    ):
+        monkeypatch.chdir(tmp_path)
+
+        class Mission(PeeweeORM):
+            name: str
+            booster: Optional[str] = Field(foreign_key="Booster")
+
+        class Booster(PeeweeORM):
+            mass: int
+            first_mission: Optional[str] = Field(foreign_key="Mission")
+
+        class Pad(PeeweeORM):
+            site: str
+
+            class Config:
+                shard = "sites"
+
+        generate(workers=1, cache=False, reactants=[Mission, Booster, Pad])
+        generate(
+            workers=1, cache=False, reactants=[Mission, Booster, Pad], shard_size=1
+        )
+
+        p = tmp_path / "reactant_products/peewee"
+        assert not (p / "models.py").exists()
+        assert {f.name for f in (p / "models").iterdir()} == {
+            "__init__.py",
+            "base.py",
+            "shard_1.py",
+            "shard_2.py",
+            "sites.py",
+        }
+        (p / "__init__.py").touch()
+        p.rename(tmp_path / "fleet")
+        monkeypatch.syspath_prepend(str(tmp_path))
+        from fleet import models
+
+        assert models.Mission.booster.rel_model is models.Booster
+        assert models.Booster.first_mission.rel_model is models.Mission
+        assert models.Pad.__module__ == "fleet.models.sites"
+        for name in [name for name in sys.modules if name.split(".")[0] == "fleet"]:
+            del sys.modules[name]
+
+    def test_django_relations_across_shards_are_lazy(self):
+        class Stage(DjangoORM):
+            thrust: int
+
+        class Engine(DjangoORM):
+            stage: str = Field(foreign_key="Stage")
+
+        chamber = DjangoCombustionChamber([Stage, Engine])
+        products = chamber.render_manager(shard_size=1)
+        files = {p.item_name: "".join(p.chunks) for p in products}
+
+        assert 'models.ForeignKey("Stage"' in files["models/shard_2"]
+        assert "from .shard_2 import Engine" in files["models/__init__"]
+
+
+class TestEnvironment:
+    def test_templates_compile_into_persistent_bytecode_cache(self, tmp_path):
+        assert isinstance(env.bytecode_cache, FileSystemBytecodeCache)
+        cache = FileSystemBytecodeCache(str(tmp_path))
+        cached_env = env.overlay(bytecode_cache=cache, cache_size=0)
+
+        cached_env.get_template("django_models.txt.jinja")
+
+        assert len(list(tmp_path.glob("__jinja2_*.cache"))) == 1
+
+
+class TestImportTime:
+    budget_us = 500_000
+
+    def test_import_reactant_skips_rendering_stack(self):
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", "import reactant"],
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        cumulative = {}
+        for line in result.stderr.splitlines():
+            _, total, package = line.split("|")
+            if total.strip().isdigit():
+                cumulative[package.strip()] = int(total)
+
+        heavy = {"black", "click", "jinja2", "django", "peewee", "sqlalchemy"}
+        assert heavy.isdisjoint(cumulative)
+        assert cumulative["reactant"] < self.budget_us
+
+    def test_generators_are_still_importable_from_main(self):
+        from reactant.main import generate, generate_django
+
+        assert generate is reaction.generate
+        assert generate_django is reaction.generate_django
+        with pytest.raises(ImportError):
+            from reactant.main import generate_everything  # noqa: F401
+
+
+class TestBenchmarks:
+    def test_synthetic_reactants_cover_every_supported_type(self):
+        from benchmarks.generation import SUPPORTED_TYPES, make_reactants
+
+        reactants = make_reactants("django", 2, 16)
+        models = DjangoCombustionChamber(reactants).get_models()
+
+        registry = DjangoCombustor.type_registry
+        supported = {registry.resolve(t) for t in SUPPORTED_TYPES["django"]}
+        assert {field.type for field in models[0].fields} == supported
+        relations = {field.type for field in models[1].fields[16:]}
+        assert relations == {"ForeignKey", "ManyToManyField", "OneToOneField"}
+
+    def test_compare_ignores_noise_and_flags_regressions(self):
+        from benchmarks.generation import compare
+
+        def run(seconds, peak_bytes):
+            metrics = {"seconds": seconds, "peak_bytes": peak_bytes}
+            return {"results": {"django/10": {"format": metrics}}}
+
+        baseline = run(1.0, 1_000_000)
+
+        assert compare(baseline, run(1.1, 1_000_000), 0.2) == []
+        assert compare(run(0.001, 100), run(0.003, 300), 0.2) == []
+        assert len(compare(baseline, run(1.5, 2_000_000), 0.2)) == 2
+
+    def test_compare_fails_when_no_case_is_in_the_baseline(self, tmp_path):
+        from benchmarks.generation import main, missing_cases
+
+        metrics = {"seconds": 1.0, "peak_bytes": 1_000_000}
+        baseline = {"results": {"django/10": {"format": metrics}}}
+        current = {"results": {"django/10/native": {"format": metrics}}}
+        assert missing_cases(baseline, current) == ["django/10/native"]
 
-        declarative_models.unlink()
-        classical_models.unlink()
+        path = tmp_path / "generation.json"
+        path.write_text(json.dumps(baseline))
+        result = CliRunner().invoke(
+            main,
+            ["--sizes", "1", "--target", "django", "--engine", "native"]
+            + ["--baseline", str(path), "--compare"],
+        )
+        assert result.exit_code == 1
+        assert "No case of this run is in the baseline." in result.output